@@ -0,0 +1,185 @@
+"""Headless batch scoring of recorded workout videos.
+
+    python analyze.py clips/ --workers 8 --out scored.csv
+    python analyze.py clips/squats/ --exercise Squats --save
+    python analyze.py tests/fixtures/clips --compare-adaptive [--record tests/fixtures/recordings]
+
+Videos are fanned out across a process pool with one pose backend per
+worker. Each video yields a save_session()-compatible record; per-video
+throughput is printed and optionally written as CSV with --stats.
+
+--compare-adaptive scores every video twice, with full inference on every
+frame and with keyframe inference plus tracking (--adaptive). It exits
+non-zero when any count differs. --record keeps the landmarks of every run
+as recording.py files, so the counts can be replayed without the model.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from counting import EXERCISES, RepCounter, session_record
+
+VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
+
+# filename / folder hints used when --exercise is not given
+_HINTS = {"push": "Push-ups", "squat": "Squats", "jack": "Jumping Jacks",
+          "plank": "Plank", "curl": "Bicep Curls", "bicep": "Bicep Curls"}
+
+_pose = None
+
+
+def guess_exercise(path):
+    low = path.lower()
+    for hint, ex in _HINTS.items():
+        if hint in low:
+            return ex
+    return None
+
+
+def find_videos(root):
+    if os.path.isfile(root):
+        return [root]
+    found = []
+    for dirpath, _, files in os.walk(root):
+        found += [os.path.join(dirpath, f) for f in files if os.path.splitext(f)[1].lower() in VIDEO_EXTS]
+    return sorted(found)
+
+
+def _init_worker():
+    # one Pose per process; keep OpenCV single-threaded so workers scale with cores
+    global _pose
+    from pose_backend import MediaPipeBackend
+    _pose = MediaPipeBackend(num_threads=1)
+
+
+def analyze_video(path, exercise, name="User", mirror=True, adaptive=False, record_dir=None):
+    import cv2
+    from contextlib import nullcontext
+    from geometry import frame_features
+    from pipeline import estimate_landmarks
+    from recording import Recorder
+    from tracking import AdaptivePose
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    pose = AdaptivePose(_pose, frame_budget=1.0 / fps) if adaptive else _pose
+    counter = RepCounter(exercise)
+    frames = 0
+    t0 = time.perf_counter()
+    with (Recorder(exercise, 0.0, record_dir) if record_dir else nullcontext()) as recorder:
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if mirror:
+                    # live frames are mirrored and the thresholds were tuned on them
+                    frame = cv2.flip(frame, 1)
+                lm = estimate_landmarks(pose, frame)
+                if recorder is not None:
+                    recorder.add(frames / fps, lm)
+                counter.step(None if lm is None else frame_features(lm, counter.signals), frames / fps)
+                frames += 1
+        finally:
+            cap.release()
+        wall = time.perf_counter() - t0
+        video_s = frames / fps
+        record = session_record(exercise, counter.counter, video_s, name=name,
+                                when=datetime.fromtimestamp(os.path.getmtime(path)))
+        if recorder is not None:
+            recorder.finish(record, {"video": os.path.basename(path), "adaptive": adaptive})
+    stats = {"video": path, "exercise": exercise, "frames": frames,
+             "video_s": round(video_s, 2), "wall_s": round(wall, 3),
+             "fps": round(frames / wall, 1) if wall else 0.0,
+             "realtime_x": round(video_s / wall, 2) if wall else 0.0}
+    return record, stats
+
+
+def compare_adaptive(path, exercise, mirror=True, record_dir=None):
+    # count of one video with full inference and with keyframe tracking
+    clip = os.path.splitext(os.path.basename(path))[0]
+    full, _ = analyze_video(path, exercise, f"{clip}-full", mirror, False, record_dir)
+    adaptive, st = analyze_video(path, exercise, f"{clip}-adaptive", mirror, True, record_dir)
+    return {"video": path, "exercise": exercise, "full": full["reps_or_seconds"],
+            "adaptive": adaptive["reps_or_seconds"], "match": full["reps_or_seconds"] == adaptive["reps_or_seconds"],
+            "frames": st["frames"]}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Score recorded workout videos without a webcam.")
+    ap.add_argument("path", help="video file or directory searched recursively")
+    ap.add_argument("--exercise", choices=EXERCISES, help="exercise for every video (default: guess from path)")
+    ap.add_argument("--name", default="User", help="name stored on the records")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="process pool size")
+    ap.add_argument("--no-mirror", action="store_true", help="do not flip frames like the live webcam view")
+    ap.add_argument("--adaptive", action="store_true", help="keyframe inference + tracking (tracking.AdaptivePose)")
+    ap.add_argument("--compare-adaptive", action="store_true",
+                    help="score each video with and without --adaptive; exit 1 if any count differs")
+    ap.add_argument("--record", help="save each run's landmarks to this directory (see recording.py)")
+    ap.add_argument("--out", help="write records to this CSV")
+    ap.add_argument("--stats", help="write per-video throughput stats to this CSV")
+    ap.add_argument("--save", action="store_true", help="append records to the session history")
+    args = ap.parse_args(argv)
+
+    jobs = []
+    for path in find_videos(args.path):
+        ex = args.exercise or guess_exercise(path)
+        if ex is None:
+            print(f"skip {path}: cannot tell the exercise, pass --exercise", file=sys.stderr)
+            continue
+        jobs.append((path, ex))
+    if not jobs:
+        print("No videos to analyze.", file=sys.stderr)
+        return 1
+
+    if args.compare_adaptive:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+            rows = list(pool.map(compare_adaptive, [p for p, _ in jobs], [ex for _, ex in jobs],
+                                 [not args.no_mirror] * len(jobs), [args.record] * len(jobs)))
+        for r in rows:
+            print(f"{r['video']}: {r['exercise']} full {r['full']}, adaptive {r['adaptive']}"
+                  f"{'' if r['match'] else '  MISMATCH'}")
+        bad = sum(not r["match"] for r in rows)
+        print(f"{len(rows) - bad}/{len(rows)} videos count the same with keyframe tracking.")
+        return 1 if bad else 0
+
+    records, stats = [], []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(analyze_video, p, ex, args.name, not args.no_mirror, args.adaptive, args.record): p
+                   for p, ex in jobs}
+        for fut in as_completed(futures):
+            try:
+                rec, st = fut.result()
+            except Exception as e:
+                print(f"fail {futures[fut]}: {e}", file=sys.stderr)
+                continue
+            records.append(rec)
+            stats.append(st)
+            print(f"{st['video']}: {rec['exercise']} {rec['reps_or_seconds']} "
+                  f"({st['frames']} frames, {st['fps']} fps, {st['realtime_x']}x realtime)")
+    wall = time.perf_counter() - t0
+    total = sum(s["frames"] for s in stats)
+    print(f"{len(records)} videos, {total} frames in {wall:.1f}s ({total / wall:.1f} fps aggregate)")
+
+    for path, rows in ((args.out, records), (args.stats, stats)):
+        if path and rows:
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+                writer.writeheader()
+                writer.writerows(rows)
+    if args.save:
+        from utils import save_session
+        for rec in sorted(records, key=lambda r: r["timestamp"]):
+            save_session(rec)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
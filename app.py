@@ -1,5 +1,9 @@
+import time
+_t0 = time.perf_counter()
 import streamlit as st
 from utils import logo_html
+from startup import imports_done
+imports_done("app", _t0)
 
 st.set_page_config(page_title="FitAI — Smart Fitness Trainer", page_icon="💪", layout="wide")
 
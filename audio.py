@@ -0,0 +1,171 @@
+"""Non-blocking audio feedback for the Workout loop.
+
+The frame loop only calls cue(), which records the request and returns. One
+long-lived worker thread owns the audio backend (and its single TTS engine)
+and plays cues in order. Pending cues coalesce by kind: if three reps land
+while a phrase is still playing, only the latest count is spoken next.
+
+Count phrases are pre-rendered to WAV files under data/audio_cache by
+prepare() and played from there when a player is available. FITAI_AUDIO=null
+selects the silent backend for headless machines.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = os.path.join("data", "audio_cache")
+
+
+class NullBackend:
+    # silent; used on headless machines and whenever the real backend cannot start
+
+    def beep(self):
+        pass
+
+    def say(self, text):
+        pass
+
+    def render(self, text, path):
+        return False
+
+    def play(self, path):
+        return False
+
+
+class SystemBackend:
+    # winsound / terminal bell for beeps, one pyttsx3 engine for speech
+
+    def __init__(self):
+        self._engine = None
+        self._player = None
+        if sys.platform == "win32":
+            import winsound
+            self._player = lambda path: winsound.PlaySound(path, winsound.SND_FILENAME)
+        else:
+            try:
+                import simpleaudio
+                self._player = lambda path: simpleaudio.WaveObject.from_wave_file(path).play().wait_done()
+            except ImportError:
+                pass
+
+    def _tts(self):
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+        return self._engine
+
+    def beep(self):
+        if sys.platform == "win32":
+            import winsound
+            winsound.Beep(880, 120)
+        else:
+            sys.stdout.write("\a")
+            sys.stdout.flush()
+
+    def say(self, text):
+        engine = self._tts()
+        engine.say(text)
+        engine.runAndWait()
+
+    def render(self, text, path):
+        if self._player is None:
+            return False
+        engine = self._tts()
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+        return os.path.exists(path)
+
+    def play(self, path):
+        if self._player is None or not os.path.exists(path):
+            return False
+        self._player(path)
+        return True
+
+
+class AudioFeedback:
+
+    def __init__(self, backend=None):
+        self.backend = backend or NullBackend()
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._rendered = set()
+        self.dropped = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="fitai-audio", daemon=True)
+        self._thread.start()
+
+    def cue(self, kind, value=None):
+        # never blocks: a newer cue of the same kind replaces the one still waiting
+        with self._cond:
+            if kind in self._pending:
+                self.dropped += 1
+                del self._pending[kind]
+            self._pending[kind] = value
+            self._cond.notify()
+
+    def beep(self):
+        self.cue("beep")
+
+    def count(self, n):
+        self.cue("count", int(n))
+
+    def prepare(self, counts):
+        # pre-render count phrases in the background so reps play from cache
+        self.cue("prepare", tuple(counts))
+
+    def _path(self, n):
+        return os.path.join(CACHE_DIR, f"count_{n}.wav")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                kind, value = self._pending.popitem(last=False)
+            try:
+                self._play(kind, value)
+            except Exception as e:
+                # a broken audio device must never take the workout down; go quiet instead
+                self.failed += 1
+                print(f"FitAI audio: {kind} failed ({e}); switching to silent backend.", file=sys.stderr)
+                self.backend = NullBackend()
+
+    def _play(self, kind, value):
+        if kind == "beep":
+            self.backend.beep()
+        elif kind == "count":
+            if not (value in self._rendered and self.backend.play(self._path(value))):
+                self.backend.say(str(value))
+        elif kind == "prepare":
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            for n in value:
+                if n in self._rendered:
+                    continue
+                if os.path.exists(self._path(n)) or self.backend.render(str(n), self._path(n)):
+                    self._rendered.add(n)
+                with self._cond:
+                    if "count" in self._pending:
+                        # a rep is waiting; let it play before rendering the rest
+                        self._pending["prepare"] = tuple(value)
+                        self._pending.move_to_end("prepare")
+                        return
+
+
+_audio = None
+_audio_lock = threading.Lock()
+
+
+def get_audio():
+    global _audio
+    with _audio_lock:
+        if _audio is None:
+            if os.environ.get("FITAI_AUDIO", "auto").lower() == "null":
+                backend = NullBackend()
+            else:
+                try:
+                    backend = SystemBackend()
+                except Exception:
+                    backend = NullBackend()
+            _audio = AudioFeedback(backend)
+        return _audio
@@ -0,0 +1,50 @@
+"""Rep counting over synthetic landmark sequences, one benchmark per exercise.
+
+live[...] is the Workout page path: frame_features() and RepCounter.step() once
+per frame. batch[...] scores 64 copies of the sequence at once with a
+CounterBank, as analyze.py and replays do. Both check the count against
+the number of reps in the sequence.
+"""
+import numpy as np
+
+from benchmarks.harness import bench
+from benchmarks.synthetic import expected_count, synthetic_landmarks
+from counting import EXERCISES, CounterBank, RepCounter
+from geometry import features, frame_features
+
+STREAMS = 64
+
+
+def _check(exercise, got):
+    want = expected_count(exercise)
+    if np.any(np.asarray(got) != want):
+        raise AssertionError(f"{exercise}: counted {got}, expected {want}")
+
+
+def _live(exercise):
+    def factory(_):
+        lm, times = synthetic_landmarks(exercise)
+
+        def fn():
+            counter = RepCounter(exercise)
+            for frame, t in zip(lm, times):
+                counter.step(frame_features(frame, counter.signals), t)
+            _check(exercise, counter.counter)
+        return fn, len(lm)
+    return factory
+
+
+def _batch(exercise):
+    def factory(_):
+        lm, times = synthetic_landmarks(exercise)
+        feats = np.repeat(features(lm)[:, None, :], STREAMS, axis=1)
+
+        def fn():
+            _check(exercise, CounterBank([exercise] * STREAMS).run(feats, times))
+        return fn, len(lm) * STREAMS
+    return factory
+
+
+for _ex in EXERCISES:
+    bench(f"counting.live[{_ex}]")(_live(_ex))
+    bench(f"counting.batch[{_ex}]")(_batch(_ex))
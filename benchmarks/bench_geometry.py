@@ -0,0 +1,47 @@
+"""Joint-angle and distance throughput: the scalar utils helpers, the vectorized geometry path
+and the per-frame path the live loop uses."""
+import numpy as np
+
+from benchmarks.harness import bench
+
+SIZES = ("10k", "100k", "1m")
+
+
+def _points(n, seed=0):
+    return np.random.default_rng(seed).uniform(0, 1, size=(n, 3, 2))
+
+
+@bench("utils.calculate_angle", SIZES)
+def calculate_angle(n):
+    from utils import calculate_angle
+    pts = _points(n).tolist()
+    return lambda: [calculate_angle(a, b, c) for a, b, c in pts], n
+
+
+@bench("utils.dist", SIZES)
+def dist(n):
+    from utils import dist
+    pts = _points(n).tolist()
+    return lambda: [dist(a, b) for a, b, _ in pts], n
+
+
+@bench("geometry.features", SIZES)
+def features(n):
+    # n frames of full feature extraction in one batched call
+    from geometry import N_LANDMARKS, features
+    lm = np.random.default_rng(0).uniform(0, 1, size=(n, N_LANDMARKS, 4)).astype(np.float32)
+    return lambda: features(lm), n
+
+
+def _frame(names):
+    def factory(n):
+        # n single frames, one call each, as the Workout loop does
+        from geometry import N_LANDMARKS, frame_features
+        lm = np.random.default_rng(0).uniform(0, 1, size=(n, N_LANDMARKS, 4)).astype(np.float32)
+        cols = () if names is None else (names,)
+        return lambda: [frame_features(frame, *cols) for frame in lm], n
+    return factory
+
+
+bench("geometry.frame_features[all]", ("10k", "100k"))(_frame(None))
+bench("geometry.frame_features[knee]", ("10k", "100k"))(_frame(("knee",)))
@@ -0,0 +1,78 @@
+"""The recommender, the History page filter path and the Insights trend at 10k / 100k / 1M rows."""
+from datetime import date
+
+import pandas as pd
+
+from benchmarks.harness import bench
+from benchmarks.synthetic import history_store, synthetic_history
+
+SIZES = ("10k", "100k", "1m")
+FILTER = {"exercises": ["Squats", "Push-ups"], "start": date(2024, 3, 1), "end": date(2024, 6, 30)}
+
+
+@bench("recommend_from_history", SIZES)
+def recommend(n):
+    from recommend import recommend_from_history
+    df = synthetic_history(n)
+    # no version, so nothing is memoized between runs
+    return lambda: recommend_from_history(df, today=date(2025, 1, 1)), n
+
+
+def history_filter(data, exercises, start, end):
+    # what pages/History.py used to do per rerun: parse every timestamp, mask, sort.
+    # The page compares datetime.date values with Timestamps, which pandas 2 rejects,
+    # so this compares normalized timestamps instead; the work per row is the same.
+    data = data.copy()
+    data["date"] = pd.to_datetime(data["timestamp"]).dt.normalize()
+    filtered = data[data["exercise"].isin(exercises) &
+                    data["date"].between(pd.Timestamp(start), pd.Timestamp(end))]
+    return filtered.sort_values("timestamp", ascending=False)
+
+
+@bench("history.filter", SIZES)
+def history_page(n):
+    df = synthetic_history(n)
+    return lambda: history_filter(df, **FILTER), n
+
+
+@bench("history.query[sqlite]", SIZES)
+def history_query(n):
+    # the same filter pushed down into SQLite
+    store = history_store("sqlite", n)
+    return lambda: store.query(**FILTER), n
+
+
+def _page(kind):
+    def factory(n):
+        # what pages/History.py does per rerun now: aggregate totals plus one keyset page
+        store = history_store(kind, n)
+
+        def fn():
+            store.totals(**FILTER)
+            rows, cursor = store.page(**FILTER, limit=50)
+            store.page(**FILTER, before=cursor, limit=50)
+        return fn, n
+    return factory
+
+
+for _kind in ("sqlite", "csv"):
+    bench(f"history.page[{_kind}]", SIZES)(_page(_kind))
+
+
+@bench("insights.trend[legacy]", SIZES)
+def insights_legacy(n):
+    # what pages/Insights.py used to do per rerun: group every row by day and chart every day
+    df = synthetic_history(n)
+
+    def fn():
+        daily = df.assign(date=pd.to_datetime(df["timestamp"]).dt.date).groupby("date")["reps_or_seconds"].sum()
+        return daily.rolling(7, min_periods=1).mean()
+    return fn, n
+
+
+@bench("insights.trend[sqlite]", SIZES)
+def insights_series(n):
+    # the whole history from the rollups: auto resolution, rolling average, trend, LTTB-bounded points
+    from timeseries import chart_frame
+    store = history_store("sqlite", n)
+    return lambda: chart_frame("total", window="auto", show_trend=True, store=store), n
@@ -0,0 +1,69 @@
+"""Session history storage at 10k / 100k / 1M rows.
+
+These time the stores behind utils.save_session and utils.load_sessions on
+temporary files. They never touch data/. save[...] appends a batch of
+sessions one by one and waits until they are durable. load[...] reads the
+whole history the way a cold SessionCache does. The benchmarks that write
+get a fresh copy of the history before every run, so every run and every
+other benchmark sees exactly n rows.
+"""
+from benchmarks.harness import bench
+from benchmarks.synthetic import fresh_store, history_store, synthetic_history
+
+SIZES = ("10k", "100k", "1m")
+BATCH = 1000
+
+
+def _save(kind):
+    def factory(n):
+        records = synthetic_history(BATCH, seed=1).to_dict("records")
+        state = {}
+
+        def reset():
+            if "store" in state:
+                state["store"].close()
+            state["store"] = fresh_store(kind, n)
+
+        def fn():
+            store = state["store"]
+            for r in records:
+                store.append(r)
+            store.flush()
+        return fn, BATCH, reset
+    return factory
+
+
+def _load(kind):
+    def factory(n):
+        store = history_store(kind, n)
+        return store.query, n
+    return factory
+
+
+def _cache_refresh(n):
+    # a warm SessionCache picking up one new session: a tail read instead of a reload.
+    # The row is inserted directly so the writer's group-commit window is not timed.
+    from session_cache import SessionCache
+    record = synthetic_history(1, seed=2).to_dict("records")
+    state = {}
+
+    def reset():
+        if "store" in state:
+            state["store"].close()
+        store = state["store"] = fresh_store("sqlite", n)
+        state["cache"] = SessionCache(store)
+        state["cache"].get()
+
+    def fn():
+        store = state["store"]
+        conn = store._conn()
+        with conn:
+            store._insert(conn, record)
+        state["cache"].get()
+    return fn, 1, reset
+
+
+for _kind in ("sqlite", "csv"):
+    bench(f"save_session[{_kind}]", SIZES)(_save(_kind))
+    bench(f"load_sessions[{_kind}]", SIZES)(_load(_kind))
+bench("load_sessions[cache tail]", SIZES)(_cache_refresh)
@@ -0,0 +1,94 @@
+"""Registry, timing and baseline files for the benchmark suite.
+
+A benchmark is a function registered with @bench. It takes a size and
+returns (fn, items). fn is the timed callable and items is how many units of
+work one call does. Setup happens before the return, so it is never timed.
+Benchmarks that change their data return (fn, items, reset). reset() runs
+untimed before every call, so each run starts from the same state.
+Each result is stored under "name@size" with the best time over a few
+repeats and the derived throughput.
+"""
+import json
+import os
+import platform
+import sys
+import time
+from collections import OrderedDict
+
+BENCHMARKS = OrderedDict()
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def bench(name, sizes=None):
+    # sizes: labels from SIZES this benchmark runs at; None means it ignores size
+    def register(fn):
+        BENCHMARKS[name] = (fn, sizes)
+        return fn
+    return register
+
+
+def measure(fn, repeat=5, max_time=10.0, reset=None):
+    # best wall time of one call over `repeat` runs; slow benchmarks stop early after max_time
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat and (not times or time.perf_counter() - start < max_time):
+        if reset is not None:
+            reset()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), len(times)
+
+
+def run(only=None, sizes=("10k", "100k", "1m"), repeat=5, log=None):
+    results = OrderedDict()
+    for name, (factory, bench_sizes) in BENCHMARKS.items():
+        if only and not any(pat in name for pat in only):
+            continue
+        for label in ([None] if bench_sizes is None else [s for s in bench_sizes if s in sizes]):
+            key = name if label is None else f"{name}@{label}"
+            try:
+                fn, items, *reset = factory(None if label is None else SIZES[label])
+                seconds, runs = measure(fn, repeat, reset=reset[0] if reset else None)
+            except Exception as e:
+                results[key] = {"error": f"{type(e).__name__}: {e}"}
+            else:
+                results[key] = {"seconds": seconds, "items": items, "runs": runs,
+                                "per_sec": items / seconds if seconds else float("inf")}
+            if log:
+                log(key, results[key])
+    return results
+
+
+def environment():
+    import numpy
+    import pandas
+    return {"machine": f"{platform.node()}|{platform.machine()}|{os.cpu_count()}",
+            "python": sys.version.split()[0], "numpy": numpy.__version__, "pandas": pandas.__version__,
+            "when": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def save(path, results):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.15):
+    # rows of (key, baseline s, current s, ratio, flag); flag is "regression", "faster" or ""
+    rows = []
+    base = baseline["results"]
+    for key, cur in results.items():
+        old = base.get(key)
+        if not old or "seconds" not in old or "seconds" not in cur:
+            continue
+        ratio = cur["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        flag = "regression" if ratio > 1 + threshold else "faster" if ratio < 1 / (1 + threshold) else ""
+        rows.append((key, old["seconds"], cur["seconds"], ratio, flag))
+    return rows
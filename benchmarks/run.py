@@ -0,0 +1,76 @@
+"""Run the benchmark suite, save baselines and compare against them.
+
+    python -m benchmarks.run                               # everything, print results
+    python -m benchmarks.run --sizes 10k --only counting   # a subset
+    python -m benchmarks.run --save                        # write this machine's baseline
+    python -m benchmarks.run --compare                     # fail on >15% slowdowns vs the baseline
+    python -m benchmarks.run --compare old.json --threshold 0.25
+
+Run from the repository root. Baselines are JSON files and default to
+benchmarks/baselines/<host>.json, because timings only compare on the same
+machine. With --compare the exit status is 1 when any benchmark regressed
+beyond the threshold, so it can gate CI.
+"""
+import argparse
+import os
+import platform
+import sys
+
+from benchmarks import bench_counting, bench_geometry, bench_history, bench_storage  # noqa: F401 (registers)
+from benchmarks.harness import SIZES, compare, load, run, save
+
+BASELINE_DIR = os.path.join("benchmarks", "baselines")
+
+
+def default_baseline():
+    host = "".join(c if c.isalnum() or c in "-_" else "_" for c in platform.node() or "local")
+    return os.path.join(BASELINE_DIR, f"{host}.json")
+
+
+def _fmt(result):
+    if "error" in result:
+        return f"ERROR {result['error']}"
+    return f"{result['seconds'] * 1000:10.2f} ms  {result['per_sec']:14,.0f} /s  ({result['runs']} runs)"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="FitAI benchmark suite.")
+    ap.add_argument("--only", nargs="+", help="run benchmarks whose name contains any of these")
+    ap.add_argument("--sizes", default="10k,100k,1m", help=f"comma-separated, from {', '.join(SIZES)}")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--save", nargs="?", const="", help="write results as a baseline (default path per host)")
+    ap.add_argument("--compare", nargs="?", const="", help="compare against a baseline (default path per host)")
+    ap.add_argument("--threshold", type=float, default=0.15, help="slowdown ratio flagged as a regression")
+    args = ap.parse_args(argv)
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",")]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        ap.error(f"unknown size: {', '.join(sorted(unknown))}")
+    baseline = None
+    if args.compare is not None:
+        path = args.compare or default_baseline()
+        if not os.path.exists(path):
+            print(f"No baseline at {path}; run with --save first.", file=sys.stderr)
+            return 2
+        baseline = load(path)
+
+    results = run(args.only, sizes, args.repeat, log=lambda key, r: print(f"{key:42s} {_fmt(r)}", flush=True))
+
+    if args.save is not None:
+        path = args.save or default_baseline()
+        save(path, results)
+        print(f"Saved baseline to {path}")
+    if baseline is None:
+        return 0
+    rows = compare(results, baseline, args.threshold)
+    print(f"\nvs baseline from {baseline['environment']['when']} (threshold {args.threshold:.0%}):")
+    for key, old, new, ratio, flag in rows:
+        print(f"{key:42s} {old * 1000:10.2f} -> {new * 1000:10.2f} ms  {ratio:5.2f}x  {flag}")
+    regressions = [r for r in rows if r[4] == "regression"]
+    print(f"{len(regressions)} regression(s) out of {len(rows)} compared.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
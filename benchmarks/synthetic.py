@@ -0,0 +1,133 @@
+"""Synthetic inputs for the benchmarks: landmark sequences and session histories.
+
+synthetic_landmarks() poses a (33, 4) skeleton so that the joint each spec
+reads follows a smooth rep cycle with a little jitter. Geometry and counting
+therefore see realistic-looking inputs, and the expected count is known.
+synthetic_history() and history_store() build session histories of any
+size in the store's column layout.
+"""
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from geometry import (L_ANKLE, L_ELBOW, L_HIP, L_KNEE, L_SHOULDER, L_WRIST, N_LANDMARKS,
+                      R_ANKLE, R_ELBOW, R_HIP, R_KNEE, R_SHOULDER, R_WRIST)
+
+# joint driven per exercise: (a, b, c) for the left and right side, (low, high) angle in degrees
+_JOINTS = {
+    "Push-ups": (((L_SHOULDER, L_ELBOW, L_WRIST), (R_SHOULDER, R_ELBOW, R_WRIST)), (80, 172)),
+    "Bicep Curls": (((L_SHOULDER, L_ELBOW, L_WRIST), (R_SHOULDER, R_ELBOW, R_WRIST)), (30, 172)),
+    "Squats": (((L_HIP, L_KNEE, L_ANKLE), (R_HIP, R_KNEE, R_ANKLE)), (80, 172)),
+    "Plank": (((L_SHOULDER, L_HIP, L_ANKLE), (R_SHOULDER, R_HIP, R_ANKLE)), (165, 175)),
+}
+
+
+def _place_angle(lm, a, b, c, deg, origin, r=0.12):
+    # a straight above b, c rotated by deg from it, so joint_angles() reads deg at b
+    lm[:, b, 0], lm[:, b, 1] = origin
+    lm[:, a, 0], lm[:, a, 1] = origin[0], origin[1] - r
+    phi = np.radians(deg - 90.0)
+    lm[:, c, 0] = origin[0] + r * np.cos(phi)
+    lm[:, c, 1] = origin[1] + r * np.sin(phi)
+
+
+def synthetic_landmarks(exercise, reps=10, fps=30.0, rep_s=2.0, jitter=1.0, seed=0):
+    # (T, 33, 4) float32 landmarks and (T,) times; Plank holds for reps * rep_s seconds
+    rng = np.random.default_rng(seed)
+    n = int(round(reps * rep_s * fps)) + int(fps)
+    times = np.arange(n) / fps
+    # cosine starting at the top of the movement, with a short rest at the end
+    phase = np.clip(times / rep_s, 0, reps)
+    wave = (1 + np.cos(2 * np.pi * phase)) / 2
+    lm = np.zeros((n, N_LANDMARKS, 4), dtype=np.float32)
+    lm[:, :, :2] = rng.uniform(0.3, 0.7, size=(N_LANDMARKS, 2))
+    lm[:, :, 3] = 1.0
+    if exercise == "Jumping Jacks":
+        # hands and feet spread from inside the hips to well outside them
+        hip_w = 0.1
+        hand = 0.08 + (1 - wave) * 0.14
+        foot = 0.08 + (1 - wave) * 0.07
+        for (l, r), width in (((L_HIP, R_HIP), hip_w), ((L_WRIST, R_WRIST), hand), ((L_ANKLE, R_ANKLE), foot)):
+            lm[:, l, 0], lm[:, r, 0] = 0.5 + width / 2, 0.5 - width / 2
+            lm[:, l, 1] = lm[:, r, 1] = lm[:, l, 1].mean()
+    else:
+        sides, (low, high) = _JOINTS[exercise]
+        deg = low + wave * (high - low) + rng.normal(0, jitter, n)
+        for k, (a, b, c) in enumerate(sides):
+            _place_angle(lm, a, b, c, deg, (0.4 + 0.2 * k, 0.5))
+    return lm, times
+
+
+def expected_count(exercise, reps=10, rep_s=2.0):
+    return int(reps * rep_s) if exercise == "Plank" else reps
+
+
+def synthetic_history(rows, users=20, days=730, seed=0, end=None):
+    # session history in the store's column layout, sorted by timestamp
+    import pandas as pd
+    from counting import EXERCISES
+    rng = np.random.default_rng(seed)
+    end = end or datetime(2025, 1, 1)
+    offsets = np.sort(rng.integers(0, days * 86400, rows))
+    stamps = pd.to_datetime(end - timedelta(days=days)) + pd.to_timedelta(offsets, unit="s")
+    return pd.DataFrame({
+        "timestamp": stamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "name": np.array([f"user{i:03d}" for i in range(users)])[rng.integers(0, users, rows)],
+        "exercise": np.array(EXERCISES)[rng.integers(0, len(EXERCISES), rows)],
+        "reps_or_seconds": rng.integers(5, 60, rows),
+        "calories": 0,
+        "duration_s": rng.integers(20, 600, rows),
+    })
+
+
+_stores = {}
+
+
+def history_store(kind, rows):
+    # a store of kind "sqlite" or "csv" holding `rows` synthetic sessions, built once per run
+    import atexit
+    import shutil
+    import tempfile
+    from store import CsvStore, SqliteStore
+    key = (kind, rows)
+    if key not in _stores:
+        tmp = tempfile.mkdtemp(prefix="fitai-bench-")
+        atexit.register(shutil.rmtree, tmp, True)
+        df = synthetic_history(rows)
+        if kind == "csv":
+            path = os.path.join(tmp, "sessions.csv")
+            df.to_csv(path, index=False)
+            _stores[key] = CsvStore(path)
+        else:
+            store = SqliteStore(os.path.join(tmp, "sessions.db"))
+            conn = store._conn()
+            records = df.to_dict("records")
+            for i in range(0, rows, 50_000):
+                with conn:
+                    store._insert(conn, records[i:i + 50_000])
+            _stores[key] = store
+    return _stores[key]
+
+
+def fresh_store(kind, rows):
+    # a private copy of history_store(kind, rows) for benchmarks that write, so the shared
+    # store that the read benchmarks use stays at exactly `rows`
+    import atexit
+    import shutil
+    import sqlite3
+    import tempfile
+    from store import CsvStore, SqliteStore
+    src = history_store(kind, rows)
+    tmp = tempfile.mkdtemp(prefix="fitai-bench-")
+    atexit.register(shutil.rmtree, tmp, True)
+    if kind == "csv":
+        path = os.path.join(tmp, "sessions.csv")
+        shutil.copyfile(src.path, path)
+        return CsvStore(path)
+    path = os.path.join(tmp, "sessions.db")
+    src.flush()
+    dst = sqlite3.connect(path)
+    src._conn().backup(dst)
+    dst.close()
+    return SqliteStore(path)
@@ -0,0 +1,304 @@
+"""Table-driven rep counting, shared by the live Workout page and offline tools.
+
+Every exercise is a spec in SPECS: the geometry.features() signals it reads,
+their smoothing, the hysteresis conditions that arm and fire a rep, and the
+debounce between reps. Timed holds (Plank) use a single hold condition.
+Specs are compiled once into index/threshold arrays, and CounterBank steps
+any number of independent streams (people, videos, recordings) in one
+vectorized call per frame. RepCounter is the single-stream counter used by
+the live page; it applies the same compiled spec with scalar arithmetic.
+
+Conditions are (signal, op, threshold) with op ">" or "<"; all conditions in
+a list must hold.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from geometry import FEATURE_INDEX
+
+SPECS = {
+    "Push-ups": {
+        "signals": ("elbow",), "smoothing": 0.45,
+        "arm": (("elbow", ">", 160),), "fire": (("elbow", "<", 95),), "debounce": 0.8,
+        "stages": ("up", "down"), "labels": ("Up", "Rep"), "start_armed": True,
+        "metric": ("elbow", 1), "announce": True,
+    },
+    "Squats": {
+        "signals": ("knee",), "smoothing": None,
+        "arm": (("knee", ">", 160),), "fire": (("knee", "<", 95),), "debounce": 0.8,
+        "stages": ("up", "down"), "labels": ("Stand", "Squat"), "start_armed": True,
+        "metric": ("knee", 1), "announce": False,
+    },
+    "Jumping Jacks": {
+        "signals": ("hand_ratio", "foot_ratio"), "smoothing": None,
+        "arm": (("hand_ratio", "<", 1.05), ("foot_ratio", "<", 1.0)),
+        "fire": (("hand_ratio", ">", 1.6), ("foot_ratio", ">", 1.2)), "debounce": 0.6,
+        "stages": ("close", "open"), "labels": (None, "Jack"), "start_armed": False,
+        "metric": ("hand_ratio", 100), "announce": False,
+    },
+    "Plank": {
+        "signals": ("body",), "smoothing": None,
+        "hold": (("body", ">", 140),),
+        "labels": ("Plank", "Fix plank"),
+        "metric": ("body", 1), "announce": False,
+    },
+    "Bicep Curls": {
+        "signals": ("elbow",), "smoothing": 0.45,
+        "arm": (("elbow", ">", 160),), "fire": (("elbow", "<", 45),), "debounce": 0.8,
+        "stages": ("down", "up"), "labels": ("Down", "Curl"), "start_armed": False,
+        "metric": ("elbow", 1), "announce": True,
+    },
+}
+
+EXERCISES = list(SPECS)
+# exercises scored in seconds held rather than reps
+TIMED = {ex for ex, s in SPECS.items() if "hold" in s}
+# exercises that beep / speak on every counted rep
+ANNOUNCED = {ex for ex, s in SPECS.items() if s.get("announce")}
+
+# per-stream outcome of the last step, used to render status text lazily
+NO_PERSON, TRACKING, ARMED, FIRED, HOLDING, BROKEN = range(6)
+
+
+class _Compiled:
+    # a spec lowered to index and threshold arrays
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.signals = spec["signals"]
+        self.cols = np.array([FEATURE_INDEX[s] for s in self.signals])
+        self.alpha = 1.0 if spec.get("smoothing") is None else float(spec["smoothing"])
+        self.timed = "hold" in spec
+        if self.timed:
+            self.hold = self._conditions(spec["hold"])
+        else:
+            self.arm = self._conditions(spec["arm"])
+            self.fire = self._conditions(spec["fire"])
+            self.debounce = float(spec["debounce"])
+        name, scale = spec["metric"]
+        self.metric_col = self.signals.index(name)
+        self.metric_scale = scale
+
+    def _conditions(self, conds):
+        pos = np.array([self.signals.index(s) for s, _, _ in conds])
+        above = np.array([op == ">" for _, op, _ in conds])
+        thr = np.array([t for _, _, t in conds], dtype=np.float64)
+        return pos, above, thr
+
+    @staticmethod
+    def holds(cond, values):
+        # values: (n, len(signals)) -> (n,) True where every condition holds
+        pos, above, thr = cond
+        v = values[:, pos]
+        return np.where(above, v > thr, v < thr).all(axis=1)
+
+
+def compile_specs(specs=None):
+    return {ex: _Compiled(s) for ex, s in (specs or SPECS).items()}
+
+
+_COMPILED = compile_specs()
+
+
+def _status(spec, outcome, count):
+    # status line for one stream's last outcome
+    if outcome == NO_PERSON:
+        return "No person"
+    if outcome == HOLDING:
+        return f"{spec['labels'][0]}: {count}s"
+    if outcome == BROKEN:
+        return spec["labels"][1]
+    if outcome == FIRED:
+        return f"{spec['labels'][1]} {count}"
+    if outcome == ARMED and spec["labels"][0]:
+        return spec["labels"][0]
+    return "Tracking"
+
+
+class CounterBank:
+    # n independent counting streams, each with its own exercise, stepped together
+
+    def __init__(self, exercises, start_times=0.0, specs=None):
+        if isinstance(exercises, str):
+            exercises = [exercises]
+        compiled = self.compiled = _COMPILED if specs is None else compile_specs(specs)
+        unknown = set(exercises) - set(compiled)
+        if unknown:
+            raise ValueError(f"Unknown exercise: {', '.join(sorted(unknown))}")
+        self.exercises = list(exercises)
+        n = self.n = len(self.exercises)
+        self.start = np.broadcast_to(np.asarray(start_times, dtype=np.float64), (n,)).copy()
+        self.count = np.zeros(n, dtype=np.int64)
+        self.last_rep = np.zeros(n)
+        self.armed = np.zeros(n, dtype=bool)
+        self.outcome = np.full(n, NO_PERSON, dtype=np.int8)
+        self.metric = np.zeros(n)
+        # one group per distinct exercise; a single-exercise bank uses a plain slice
+        self.groups = []
+        for ex in dict.fromkeys(self.exercises):
+            spec = compiled[ex]
+            idx = slice(None) if len(set(self.exercises)) == 1 else \
+                np.flatnonzero(np.array(self.exercises) == ex)
+            smoothed = np.full((len(self.count[idx]), len(spec.cols)), np.nan)
+            if not spec.timed:
+                self.armed[idx] = spec.spec["start_armed"]
+            self.groups.append((spec, idx, smoothed))
+
+    def step(self, feats, now, valid=None):
+        # feats: (n, len(FEATURES)); now: scalar or (n,); valid: (n,) person-in-frame mask.
+        # Returns an (n,) mask of streams that counted a rep on this frame.
+        feats = np.asarray(feats, dtype=np.float64).reshape(self.n, -1)
+        now = np.broadcast_to(np.asarray(now, dtype=np.float64), (self.n,))
+        if valid is None:
+            valid = ~np.isnan(feats).any(axis=1)
+        fired = np.zeros(self.n, dtype=bool)
+        self.outcome[:] = NO_PERSON
+        self.metric[:] = 0
+        for spec, idx, smoothed in self.groups:
+            ok = valid[idx]
+            if not ok.any():
+                continue
+            raw = feats[idx][:, spec.cols]
+            # EMA; the first valid frame of a stream seeds it with the raw value
+            smoothed[ok] = np.where(np.isnan(smoothed[ok]), raw[ok],
+                                    spec.alpha * raw[ok] + (1 - spec.alpha) * smoothed[ok])
+            vals = smoothed
+            outcome = np.where(ok, TRACKING, NO_PERSON)
+            metric = np.where(ok, vals[:, spec.metric_col] * spec.metric_scale, 0)
+            t = now[idx]
+            if spec.timed:
+                good = ok & spec.holds(spec.hold, vals)
+                count = self.count[idx]
+                self.count[idx] = np.where(good, (t - self.start[idx]).astype(np.int64), count)
+                outcome = np.where(good, HOLDING, np.where(ok, BROKEN, NO_PERSON))
+            else:
+                arm = ok & spec.holds(spec.arm, vals)
+                armed = self.armed[idx] | arm
+                rep = ok & armed & spec.holds(spec.fire, vals) & (t - self.last_rep[idx] > spec.debounce)
+                self.count[idx] += rep
+                self.last_rep[idx] = np.where(rep, t, self.last_rep[idx])
+                self.armed[idx] = armed & ~rep
+                outcome = np.where(rep, FIRED, np.where(arm, ARMED, outcome))
+                fired[idx] = rep
+            self.outcome[idx] = outcome
+            self.metric[idx] = metric
+        return fired
+
+    def stage(self, i):
+        spec = self.compiled[self.exercises[i]]
+        if spec.timed:
+            return None
+        return spec.spec["stages"][0 if self.armed[i] else 1]
+
+    def status(self, i):
+        return _status(self.compiled[self.exercises[i]].spec, self.outcome[i], self.count[i])
+
+    def run(self, feats, times, valid=None):
+        # offline evaluation: feats (T, n, len(FEATURES)), times (T,) or (T, n). Returns counts (n,).
+        for i in range(len(feats)):
+            self.step(feats[i], times[i], None if valid is None else valid[i])
+        return self.count.copy()
+
+
+class RepCounter:
+    # single live stream with the attributes the Workout page reads. Same compiled spec and
+    # rules as CounterBank, stepped on plain floats: per frame, NumPy's call overhead would
+    # cost far more than the arithmetic.
+
+    def __init__(self, exercise, start_time=0.0, specs=None):
+        compiled = _COMPILED if specs is None else compile_specs(specs)
+        if exercise not in compiled:
+            raise ValueError(f"Unknown exercise: {exercise}")
+        spec = self._spec = compiled[exercise]
+        self.exercise = exercise
+        self.start = float(start_time)
+        # the geometry.frame_features() columns this counter reads
+        self.signals = tuple(spec.signals)
+        self._cols = tuple(int(i) for i in spec.cols)
+        self._alpha = spec.alpha
+        self._metric_col, self._metric_scale = spec.metric_col, spec.metric_scale
+        lower = lambda cond: tuple(zip(cond[0].tolist(), cond[1].tolist(), cond[2].tolist()))
+        if spec.timed:
+            self._hold = lower(spec.hold)
+        else:
+            self._arm, self._fire = lower(spec.arm), lower(spec.fire)
+            self._debounce = spec.debounce
+        self.counter = 0
+        self._armed = not spec.timed and bool(spec.spec["start_armed"])
+        self._last_rep = 0.0
+        self._smoothed = None
+        self._outcome = NO_PERSON
+        self._metric = 0.0
+
+    @staticmethod
+    def _holds(conds, vals):
+        for pos, above, thr in conds:
+            if not (vals[pos] > thr if above else vals[pos] < thr):
+                return False
+        return True
+
+    def step(self, f, now):
+        # f: a geometry.features() / frame_features() row, or None when nobody is in frame.
+        # True when a rep was counted.
+        raw = None if f is None else [float(f[i]) for i in self._cols]
+        if raw is None or any(v != v for v in raw):
+            self._outcome, self._metric = NO_PERSON, 0.0
+            return False
+        # EMA; the first valid frame seeds it with the raw value
+        s = self._smoothed
+        a = self._alpha
+        s = self._smoothed = raw if s is None else [a * r + (1 - a) * v for r, v in zip(raw, s)]
+        self._metric = s[self._metric_col] * self._metric_scale
+        if self._spec.timed:
+            if self._holds(self._hold, s):
+                self.counter = int(now - self.start)
+                self._outcome = HOLDING
+            else:
+                self._outcome = BROKEN
+            return False
+        arm = self._holds(self._arm, s)
+        armed = self._armed or arm
+        rep = armed and self._holds(self._fire, s) and now - self._last_rep > self._debounce
+        if rep:
+            self.counter += 1
+            self._last_rep = now
+        self._armed = armed and not rep
+        self._outcome = FIRED if rep else ARMED if arm else TRACKING
+        return rep
+
+    @property
+    def stage(self):
+        if self._spec.timed:
+            return None
+        return self._spec.spec["stages"][0 if self._armed else 1]
+
+    @property
+    def status(self):
+        return _status(self._spec.spec, self._outcome, self.counter)
+
+    @property
+    def metric(self):
+        return int(self._metric)
+
+
+def count_reps(exercise, feats, times, specs=None):
+    # whole-sequence count for one stream: feats (T, len(FEATURES)) with NaN rows where nobody was seen
+    bank = CounterBank([exercise], 0.0, specs)
+    return int(bank.run(np.asarray(feats)[:, None, :], np.asarray(times))[0])
+
+
+def session_record(exercise, count, duration_s, name="User", when=None):
+    # row in the shape utils.save_session() stores
+    when = when or datetime.now()
+    return {"timestamp": when.strftime("%Y-%m-%d %H:%M:%S"),
+            "name": name, "exercise": exercise, "reps_or_seconds": int(count),
+            "calories": 0, "duration_s": int(duration_s)}
+
+
+def session_key(record):
+    # file-name-safe key for data kept next to a saved record (perf stats, recordings)
+    ts = str(record["timestamp"]).replace("-", "").replace(":", "").replace(" ", "-")
+    name = "".join(c if c.isalnum() else "_" for c in str(record.get("name", "")))
+    exercise = "".join(c if c.isalnum() else "_" for c in str(record.get("exercise", "")))
+    return f"{ts}_{name}_{exercise}"
@@ -0,0 +1,70 @@
+"""Bandwidth-aware delivery of live frames to the browser.
+
+FrameDelivery sits between the frame loop and the st.empty() video panel.
+prepare() decides whether a frame goes out at all, based on the UI refresh
+cap and backpressure, and shrinks it to the displayed width. The overlay is
+then drawn on that small copy. send() encodes it as JPEG or WebP at the
+configured quality and pushes it to the panel. Inference and counting keep
+running on every frame whatever the UI rate is.
+
+Streamlit has no delivery acknowledgement. A push that takes longer than
+the frame interval is taken to mean the client or link is behind, and the
+interval backs off until pushes are fast again.
+"""
+import time
+
+from startup import timed_import
+
+# format -> (file extension, name of the cv2 quality flag); cv2 is only loaded by FrameDelivery
+FORMATS = {"JPEG": (".jpg", "IMWRITE_JPEG_QUALITY"), "WebP": (".webp", "IMWRITE_WEBP_QUALITY")}
+
+
+class FrameDelivery:
+
+    def __init__(self, panel, width=640, quality=70, fmt="JPEG", max_fps=15.0, max_backoff=8.0):
+        cv2 = self._cv2 = timed_import("cv2")
+        self.panel = panel
+        self.width = int(width)
+        self.quality = int(quality)
+        self.ext, flag = FORMATS[fmt]
+        self.quality_flag = getattr(cv2, flag)
+        self.min_interval = 1.0 / max_fps
+        self.max_interval = self.min_interval * max_backoff
+        self.interval = self.min_interval
+        self._last = 0.0
+        self.sent = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+
+    def prepare(self, frame):
+        # a display-sized copy of frame to draw on, or None when this frame should not be sent
+        now = time.perf_counter()
+        if now - self._last < self.interval:
+            self.skipped += 1
+            return None
+        cv2 = self._cv2
+        h, w = frame.shape[:2]
+        if w > self.width:
+            return cv2.resize(frame, (self.width, int(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        return frame.copy()
+
+    def send(self, frame):
+        t0 = time.perf_counter()
+        ok, buf = self._cv2.imencode(self.ext, frame, [self.quality_flag, self.quality])
+        if not ok:
+            return
+        data = buf.tobytes()
+        self.panel.image(data, use_column_width=True)
+        t1 = time.perf_counter()
+        # backpressure: slow pushes stretch the interval, fast ones let it recover
+        if t1 - t0 > self.interval:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        else:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+        self._last = t1
+        self.sent += 1
+        self.bytes_sent += len(data)
+
+    def stats(self):
+        return {"sent": self.sent, "skipped": self.skipped, "ui_fps": round(1.0 / self.interval, 1),
+                "kb_per_frame": round(self.bytes_sent / max(1, self.sent) / 1024, 1)}
@@ -0,0 +1,189 @@
+"""Streaming export of session history as CSV, gzipped CSV or Parquet.
+
+Rows are pulled from the store in chunks (SessionStore.iter_chunks) and
+written out chunk by chunk, so memory use depends on the chunk size and not
+on the size of the history. Parquet needs pyarrow and is only offered when
+it is installed; every chunk becomes one row group.
+
+Pages call export_file() only when the user asks for a download. It writes
+under data/exports/ and first removes exports older than EXPORT_TTL, so a
+file whose browser session ended before the download is not kept for good.
+The CLI writes straight to disk, for one filter or for every user:
+
+    python export.py --format csv.gz --out exports/history.csv.gz --exercise Squats --start 2024-01-01
+    python export.py --all-users --format parquet --out exports/
+"""
+import argparse
+import gzip
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+# format -> (file extension, MIME type)
+FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+EXPORT_DIR = os.path.join("data", "exports")
+EXPORT_TTL = 3600  # seconds an unclaimed page export is kept
+
+_DTYPES = {"timestamp": "string", "name": "string", "exercise": "string",
+           "reps_or_seconds": "Int64", "calories": "Float64", "duration_s": "Int64"}
+
+
+def has_parquet():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_formats():
+    return [f for f in FORMATS if f != "parquet" or has_parquet()]
+
+
+def _write_csv(chunks, raw):
+    from store import COLUMNS
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    rows, header = 0, True
+    try:
+        for chunk in chunks:
+            chunk.to_csv(text, header=header, index=False)
+            rows += len(chunk)
+            header = False
+        if header:
+            # nothing matched: still a valid CSV with the usual columns
+            text.write(",".join(COLUMNS) + "\n")
+    finally:
+        text.flush()
+        text.detach()
+    return rows
+
+
+def _write_parquet(chunks, raw):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer, rows = None, 0
+    try:
+        for chunk in chunks:
+            # fixed dtypes, so every row group has the same schema whatever its values
+            table = pa.Table.from_pandas(chunk.astype(_DTYPES, errors="ignore"), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(raw, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_chunks(chunks, raw, fmt="csv"):
+    # chunks: iterable of DataFrames; raw: binary file object. Returns the number of rows written.
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "parquet":
+        if not has_parquet():
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        return _write_parquet(chunks, raw)
+    if fmt == "csv.gz":
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as gz:
+            return _write_csv(chunks, gz)
+    return _write_csv(chunks, raw)
+
+
+def export_sessions(path, fmt="csv", exercises=None, start=None, end=None, name=None,
+                    chunksize=10000, store=None):
+    # filtered history -> file at path; returns the number of rows
+    if store is None:
+        from store import get_store
+        store = get_store()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".part"
+    with open(tmp, "wb") as f:
+        rows = write_chunks(store.iter_chunks(exercises, start, end, name, chunksize), f, fmt)
+    os.replace(tmp, path)
+    return rows
+
+
+def prune_exports(directory=EXPORT_DIR, ttl=EXPORT_TTL):
+    # removes exports (and unfinished .part files) last written more than ttl seconds ago
+    cutoff = time.time() - ttl
+    removed = 0
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # another session pruned it first
+    return removed
+
+
+def export_file(fmt="csv", exercises=None, start=None, end=None, name=None, chunksize=10000,
+                directory=EXPORT_DIR):
+    # streams the export into a new file under directory and returns (path, rows); the caller
+    # removes it once downloaded, and prune_exports() clears the ones that never were
+    os.makedirs(directory, exist_ok=True)
+    prune_exports(directory)
+    fd, path = tempfile.mkstemp(prefix="fitai-export-", suffix=FORMATS[fmt][0], dir=directory)
+    os.close(fd)
+    try:
+        return path, export_sessions(path, fmt, exercises, start, end, name, chunksize)
+    except Exception:
+        os.remove(path)
+        raise
+
+
+def frame_bytes(df, fmt="csv"):
+    # small, already materialized frames (a plan, a page) in one of the export formats
+    buf = io.BytesIO()
+    write_chunks([df], buf, fmt)
+    return buf.getvalue()
+
+
+def _safe(name):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(name)) or "_"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export FitAI session history.")
+    ap.add_argument("--format", choices=list(FORMATS), default="csv")
+    ap.add_argument("--out", required=True, help="output file, or a directory with --all-users")
+    ap.add_argument("--exercise", action="append", help="repeat to export several exercises")
+    ap.add_argument("--start", type=date.fromisoformat, help="first day, YYYY-MM-DD")
+    ap.add_argument("--end", type=date.fromisoformat, help="last day, YYYY-MM-DD (inclusive)")
+    ap.add_argument("--name", help="only this user's sessions")
+    ap.add_argument("--all-users", action="store_true", help="one file per user in the --out directory")
+    ap.add_argument("--chunksize", type=int, default=50000)
+    args = ap.parse_args(argv)
+
+    if args.format == "parquet" and not has_parquet():
+        print("Parquet export needs pyarrow (pip install pyarrow).", file=sys.stderr)
+        return 1
+    ext = FORMATS[args.format][0]
+    if not args.all_users:
+        rows = export_sessions(args.out, args.format, args.exercise, args.start, args.end, args.name, args.chunksize)
+        print(f"{rows} sessions -> {args.out}")
+        return 0
+
+    from store import get_store
+    users = sorted(u for u in get_store().user_marks() if u is not None)
+    total = 0
+    for user in users:
+        path = os.path.join(args.out, _safe(user) + ext)
+        rows = export_sessions(path, args.format, args.exercise, args.start, args.end, user, args.chunksize)
+        total += rows
+        print(f"{user}: {rows} sessions -> {path}")
+    print(f"{total} sessions for {len(users)} users.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
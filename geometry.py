@@ -0,0 +1,153 @@
+"""Vectorized joint geometry over MediaPipe's 33-landmark pose skeleton.
+
+Landmarks are handled as float32 arrays of shape (33, 4) holding x, y, z and
+visibility. Every function here also accepts stacked input of shape
+(..., 33, 4), so a whole recorded session (T, 33, 4) goes through the same
+code as a single live frame. The live loop steps one frame at a time, where
+NumPy's per-call overhead dominates. frame_features() covers that case with
+plain floats and computes only the columns asked for.
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+
+N_LANDMARKS = 33
+
+# MediaPipe pose landmark indices
+L_SHOULDER, R_SHOULDER = 11, 12
+L_ELBOW, R_ELBOW = 13, 14
+L_WRIST, R_WRIST = 15, 16
+L_HIP, R_HIP = 23, 24
+L_KNEE, R_KNEE = 25, 26
+L_ANKLE, R_ANKLE = 27, 28
+
+# joint angles as (a, b, c) triplets, angle measured at b
+ANGLES = {
+    "l_elbow": (L_SHOULDER, L_ELBOW, L_WRIST),
+    "r_elbow": (R_SHOULDER, R_ELBOW, R_WRIST),
+    "l_knee": (L_HIP, L_KNEE, L_ANKLE),
+    "r_knee": (R_HIP, R_KNEE, R_ANKLE),
+    "l_body": (L_SHOULDER, L_HIP, L_ANKLE),
+    "r_body": (R_SHOULDER, R_HIP, R_ANKLE),
+}
+
+# limb distances as (a, b) pairs
+DISTANCES = {
+    "hip_w": (L_HIP, R_HIP),
+    "hand_w": (L_WRIST, R_WRIST),
+    "foot_w": (L_ANKLE, R_ANKLE),
+}
+
+# limb segments drawn over the video
+SKELETON = (
+    (L_SHOULDER, R_SHOULDER), (L_HIP, R_HIP),
+    (L_SHOULDER, L_ELBOW), (L_ELBOW, L_WRIST), (R_SHOULDER, R_ELBOW), (R_ELBOW, R_WRIST),
+    (L_SHOULDER, L_HIP), (R_SHOULDER, R_HIP),
+    (L_HIP, L_KNEE), (L_KNEE, L_ANKLE), (R_HIP, R_KNEE), (R_KNEE, R_ANKLE),
+)
+
+# derived columns: left/right averages and widths relative to the hips
+DERIVED = ("elbow", "knee", "body", "hand_ratio", "foot_ratio")
+
+FEATURES = tuple(ANGLES) + tuple(DISTANCES) + DERIVED
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+# hip width used when the hips collapse onto each other (side-on camera)
+FALLBACK_HIP_W = 0.25
+
+_A, _B, _C = (np.array(ix) for ix in zip(*ANGLES.values()))
+_P, _Q = (np.array(ix) for ix in zip(*DISTANCES.values()))
+
+
+def landmarks_to_array(pose_landmarks, out=None):
+    # res.pose_landmarks -> (33, 4) float32, or None when nobody is in frame
+    if not pose_landmarks:
+        return None
+    if out is None:
+        out = np.empty((N_LANDMARKS, 4), dtype=np.float32)
+    out[:] = [(p.x, p.y, p.z, p.visibility) for p in pose_landmarks.landmark]
+    return out
+
+
+def joint_angles(lm):
+    # (..., 33, 4) -> (..., len(ANGLES)) in degrees, same convention as utils.calculate_angle
+    xy = np.asarray(lm)[..., :2].astype(np.float64)
+    a, b, c = xy[..., _A, :], xy[..., _B, :], xy[..., _C, :]
+    ang = np.degrees(np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+                     - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    return np.abs(np.where(ang > 0, ang, 360 + ang))
+
+
+def limb_distances(lm):
+    # (..., 33, 4) -> (..., len(DISTANCES)) 2D euclidean distances
+    xy = np.asarray(lm)[..., :2].astype(np.float64)
+    d = xy[..., _P, :] - xy[..., _Q, :]
+    return np.sqrt(d[..., 0] ** 2 + d[..., 1] ** 2)
+
+
+def features(lm):
+    # every signal the rep counters need, in one batched pass: (..., len(FEATURES))
+    ang = joint_angles(lm)
+    dst = limb_distances(lm)
+    hip_w = dst[..., 0]
+    hip_w = np.where(hip_w > 1e-6, hip_w, FALLBACK_HIP_W)
+    derived = np.stack([
+        (ang[..., 0] + ang[..., 1]) / 2.0,
+        (ang[..., 2] + ang[..., 3]) / 2.0,
+        (ang[..., 4] + ang[..., 5]) / 2.0,
+        dst[..., 1] / hip_w,
+        dst[..., 2] / hip_w,
+    ], axis=-1)
+    return np.concatenate([ang, dst, derived], axis=-1)
+
+
+# inputs of each derived column
+_DEPENDS = {"elbow": ("l_elbow", "r_elbow"), "knee": ("l_knee", "r_knee"), "body": ("l_body", "r_body"),
+            "hand_ratio": ("hand_w", "hip_w"), "foot_ratio": ("foot_w", "hip_w")}
+
+
+@lru_cache(maxsize=None)
+def _plan(names):
+    # steps (kind, output column, operands) for `names`, inputs before the derived columns that use them
+    need = set(names)
+    for n in names:
+        need.update(_DEPENDS.get(n, ()))
+    unknown = need - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown feature: {', '.join(sorted(unknown))}")
+    steps = []
+    for n in FEATURES:
+        if n not in need:
+            continue
+        if n in ANGLES:
+            steps.append((0, FEATURE_INDEX[n], ANGLES[n]))
+        elif n in DISTANCES:
+            steps.append((1, FEATURE_INDEX[n], DISTANCES[n]))
+        else:
+            steps.append((2 if n.endswith("_ratio") else 3, FEATURE_INDEX[n],
+                          tuple(FEATURE_INDEX[d] for d in _DEPENDS[n])))
+    return tuple(steps)
+
+
+def frame_features(lm, names=FEATURES):
+    # one (33, 4) frame -> list in FEATURES order, like features(lm), but only `names`
+    # (and what they derive from) are computed; the other columns are NaN
+    # item() reads single values without building an array or a full list of the frame
+    p = lm.item
+    out = [math.nan] * len(FEATURES)
+    for kind, i, ix in _plan(names if type(names) is tuple else tuple(names)):
+        if kind == 0:
+            a, b, c = ix
+            bx, by = p(b, 0), p(b, 1)
+            ang = math.degrees(math.atan2(p(c, 1) - by, p(c, 0) - bx) - math.atan2(p(a, 1) - by, p(a, 0) - bx))
+            out[i] = abs(ang if ang > 0 else 360 + ang)
+        elif kind == 1:
+            a, b = ix
+            out[i] = math.hypot(p(a, 0) - p(b, 0), p(a, 1) - p(b, 1))
+        elif kind == 2:
+            w = out[ix[1]]
+            out[i] = out[ix[0]] / (w if w > 1e-6 else FALLBACK_HIP_W)
+        else:
+            out[i] = (out[ix[0]] + out[ix[1]]) / 2.0
+    return out
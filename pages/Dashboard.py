@@ -1,5 +1,9 @@
+import time
+_t0 = time.perf_counter()
 import streamlit as st
-from utils import load_sessions, logo_html
+from utils import load_sessions, sessions_version, exercise_stats, current_user, load_plan, logo_html
+from startup import imports_done
+imports_done("Dashboard", _t0)
 
 # --- Logo centered + highlighted
 st.markdown(
@@ -15,12 +19,13 @@ st.markdown(
 )
 
 # --- Load user workout data
-data = load_sessions()
+user = current_user()
+ex_stats = exercise_stats(user)
 
-if data is not None and not data.empty:
-    total_sessions = len(data)
-    total_reps = int(data["reps_or_seconds"].sum())
-    total_cal = int((data["reps_or_seconds"] * 0.5).sum())
+if not ex_stats.empty:
+    total_sessions = int(ex_stats["sessions"].sum())
+    total_reps = int(ex_stats["total"].sum())
+    total_cal = int(ex_stats["total"].sum() * 0.5)
 
     col1, col2, col3 = st.columns(3)
     col1.metric("🏋️ Total Sessions", total_sessions)
@@ -28,138 +33,32 @@ if data is not None and not data.empty:
     col3.metric("⚡ Calories Burned", total_cal)
 
     st.markdown("### 📊 Workout Distribution")
-    st.bar_chart(data.groupby("exercise")["reps_or_seconds"].sum())
+    st.bar_chart(ex_stats.set_index("exercise")["total"].rename("reps_or_seconds"))
+
+    st.markdown("### 📈 Last 12 Weeks")
+    from datetime import date, timedelta
+    from timeseries import chart_frame
+    weekly, _, slope = chart_frame("total", user, start=date.today() - timedelta(weeks=12), end=date.today(),
+                                   resolution="week", show_trend=True)
+    st.line_chart(weekly)
+    st.caption(f"Trend: {slope:+.1f} reps/secs per week")
 
 else:
     st.info("No workout data yet. Start your first session in the **Workout** page to see insights here!")
 
 # --- AI Recommendation & Personalization (Pro) ---
-import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from recommend import recommend_from_history
 
 st.markdown("## 🧠 Smart Personalized Plan", unsafe_allow_html=True)
 
-def compute_trend(series):
-    # series: pandas Series indexed by date with numeric values
-    if len(series) < 2:
-        return 0.0
-    # convert dates to ordinal
-    x = np.arange(len(series))
-    y = series.values.astype(float)
-    try:
-        m, c = np.polyfit(x, y, 1)  # slope
-        return float(m)
-    except Exception:
-        return 0.0
-
-def recommend_from_history(df):
-    # Expecting columns: timestamp, exercise, reps_or_seconds, duration_s
-    df = df.copy()
-    if df.empty:
-        return {"note": "No data yet — do a few workouts to unlock recommendations."}
-
-    # ensure types
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df["date"] = df["timestamp"].dt.date
-    recent_cutoff = (df["timestamp"].max() - pd.Timedelta(days=21))
-    recent = df[df["timestamp"] >= recent_cutoff]
-
-    # 1) Average & total by exercise
-    stats = df.groupby("exercise")["reps_or_seconds"].agg(["mean","median","sum","count"]).rename(columns={
-        "mean":"avg","median":"med","sum":"total","count":"sessions"
-    })
-
-    # 2) identify weakest & strongest (by average)
-    avg_sorted = stats["avg"].sort_values()
-    weakest = avg_sorted.index[0] if not avg_sorted.empty else None
-    strongest = avg_sorted.index[-1] if not avg_sorted.empty else None
-
-    # 3) Trend per exercise (using last 21 days)
-    trends = {}
-    for ex in df["exercise"].unique():
-        series = (df[df["exercise"]==ex]
-                  .groupby("date")["reps_or_seconds"]
-                  .mean()
-                  .sort_index())
-        trends[ex] = compute_trend(series)
-
-    # 4) Recent consistency (how many sessions in last 21 days)
-    recent_counts = recent.groupby("exercise")["reps_or_seconds"].count().to_dict()
-
-    # 5) Suggest next-session targets:
-    next_targets = {}
-    for ex in stats.index:
-        base = float(stats.loc[ex, "avg"])
-        # If trending up, keep moderate bump; if trending down, keep small bump or maintain
-        slope = trends.get(ex, 0.0)
-        if slope > 0.2:
-            bump = 1.10  # +10%
-        elif slope < -0.2:
-            bump = 1.03  # +3%
-        else:
-            bump = 1.06  # +6%
-        # plank-like exercises store seconds — we still treat as numeric
-        suggested = max(1, int(round(base * bump)))
-        next_targets[ex] = suggested
-
-    # 6) 7-day mini plan (3 sessions/week balanced)
-    # Prioritize weakest (2 sessions), then mix strongest + one other
-    exercises = list(stats.index)
-    plan = []
-    wk = 0
-    days = []
-    today = datetime.now().date()
-    # pick two other exercises (not weakest) for variety
-    others = [e for e in exercises if e != weakest]
-    # build 3 sessions in coming 7 days
-    for d in range(7):
-        day = today + timedelta(days=d)
-        # schedule on Mon/Wed/Fri-ish -> choose roughly every 2-3 days
-        if len(plan) >= 3:
-            break
-        # simple distribution: day indices 0..6 -> pick 1,3,5
-        if d in [0,2,4]:  # today, +2, +4
-            if len(plan) == 0:
-                sess_ex = weakest
-            elif len(plan) == 1:
-                sess_ex = others[0] if others else weakest
-            else:
-                sess_ex = strongest if strongest else weakest
-            recommended_reps = next_targets.get(sess_ex, 10)
-            plan.append({
-                "date": day.strftime("%Y-%m-%d"),
-                "exercise": sess_ex,
-                "recommended_reps_or_secs": recommended_reps,
-                "note": "Focus on form + controlled tempo"
-            })
-
-    # 7) short textual recommendation
-    rec_text = []
-    rec_text.append(f"Your weakest exercise is **{weakest}** (avg {stats.loc[weakest,'avg']:.1f}).")
-    rec_text.append(f"Your strongest exercise is **{strongest}** (avg {stats.loc[strongest,'avg']:.1f}).")
-    # trend summary
-    improving = [e for e,s in trends.items() if s > 0.2]
-    declining = [e for e,s in trends.items() if s < -0.2]
-    if improving:
-        rec_text.append(f"Improving recently at: {', '.join(improving)}.")
-    if declining:
-        rec_text.append(f"Needs attention (declining): {', '.join(declining)}.")
-    rec_text.append("Next session targets provided below. Aim for consistent form — not speed.")
-
-    return {
-        "stats": stats.reset_index(),
-        "weakest": weakest,
-        "strongest": strongest,
-        "trends": trends,
-        "next_targets": next_targets,
-        "mini_plan": plan,
-        "note": "Auto-generated from your last sessions (local).",
-        "text": "\n".join(rec_text)
-    }
-
-# run recommender
-rec = recommend_from_history(data if 'data' in locals() else pd.DataFrame())
+# precomputed plan (python plans.py); fall back to a live, memoized run when it is missing or stale.
+# the user's sessions are only queried when the memo misses, so button reruns cost a lookup
+rec, fresh = load_plan(user)
+if rec is None or not fresh:
+    rec = recommend_from_history(lambda: load_sessions(name=user), version=sessions_version(), scope=user)
+else:
+    st.caption(f"Plan precomputed at {rec['computed_at']}.")
 
 if "note" in rec and rec.get("stats", None) is None:
     st.info(rec["note"])
@@ -187,8 +86,8 @@ else:
     col_a, col_b = st.columns(2)
     with col_a:
         if st.button("Save Mini Plan as CSV"):
-            csv = plan_df.to_csv(index=False).encode("utf-8")
-            st.download_button("Download Plan CSV", csv, "fitai_mini_plan.csv", "text/csv")
+            from export import frame_bytes
+            st.download_button("Download Plan CSV", frame_bytes(plan_df), "fitai_mini_plan.csv", "text/csv")
     with col_b:
         if st.button("Apply Targets to Next Workout (sets)"):
             st.success("Targets applied to memory — next Workout session will show updated target suggestions (local only).")
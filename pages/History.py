@@ -1,7 +1,12 @@
+import time
+_t0 = time.perf_counter()
+import os
 import streamlit as st
-import pandas as pd
-from datetime import datetime
-from utils import load_sessions, logo_html
+from datetime import date
+from utils import session_page, session_totals, session_extent, current_user, logo_html
+from export import FORMATS, available_formats, export_file
+from startup import imports_done
+imports_done("History", _t0)
 
 st.set_page_config(page_title="Workout History", page_icon="📊", layout="wide")
 
@@ -25,46 +30,84 @@ st.markdown(f"""
     </div>
 """, unsafe_allow_html=True)
 
-# --- Load Data ---
-data = load_sessions()
+# --- Filter bounds (cheap: distinct exercises and MIN/MAX timestamp) ---
+# everything below is scoped to the signed-in user, like Dashboard and Insights
+user = current_user()
+exercises, first, last = session_extent(user)
 
-if data is None or data.empty:
+if first is None:
     st.info("No history yet. Complete a few workouts first to see results here.")
     st.stop()
 
-# Convert date
-if "timestamp" in data.columns:
-    data["date"] = pd.to_datetime(data["timestamp"]).dt.date
-
 # --- Sidebar Filters ---
 with st.sidebar:
     st.subheader("🔎 Filters")
-    exercises = sorted(data["exercise"].unique().tolist())
     selected = st.multiselect("Exercise Type", exercises, default=exercises)
-    min_date, max_date = data["date"].min(), data["date"].max()
+    min_date, max_date = date.fromisoformat(first[:10]), date.fromisoformat(last[:10])
     date_range = st.date_input("Date Range", [min_date, max_date])
+    page_size = st.selectbox("Rows per page", [25, 50, 100, 200], index=1)
 
-# Apply filters
-filtered = data[
-    (data["exercise"].isin(selected)) &
-    (data["date"].between(pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])))
-]
+# a half-picked range (start only) filters from that day on
+start = date_range[0] if len(date_range) > 0 else None
+end = date_range[1] if len(date_range) > 1 else None
 
-# --- Metrics ---
+# --- Metrics (aggregate query, no rows materialized) ---
+totals = session_totals(selected, start, end, user)
 col1, col2, col3 = st.columns(3)
-col1.metric("Total Sessions", len(filtered))
-col2.metric("Total Reps / Secs", int(filtered["reps_or_seconds"].sum()))
-col3.metric("Total Duration (s)", int(filtered["duration_s"].sum()))
+col1.metric("Total Sessions", totals["sessions"])
+col2.metric("Total Reps / Secs", int(totals["total"]))
+col3.metric("Total Duration (s)", int(totals["duration"]))
 
 st.divider()
 
-# --- Table ---
+# --- Table: one keyset page at a time, newest first ---
+# cursors of the pages visited so far; a filter change starts again from the newest page
+filters = (user, tuple(selected), start, end, page_size)
+if st.session_state.get("history_filters") != filters:
+    st.session_state.history_filters = filters
+    st.session_state.history_cursors = [None]
+cursors = st.session_state.history_cursors
+
 st.markdown("<h3 class='neon'>📋 Session Details</h3>", unsafe_allow_html=True)
-st.dataframe(filtered.sort_values("timestamp", ascending=False), use_container_width=True)
+rows, next_cursor = session_page(selected, start, end, user, before=cursors[-1], limit=page_size)
+st.dataframe(rows, use_container_width=True)
+
+pages = max(1, -(-totals["sessions"] // page_size))
+nav_prev, nav_info, nav_next = st.columns([1, 2, 1])
+if nav_prev.button("⬅️ Newer", disabled=len(cursors) == 1):
+    cursors.pop()
+    st.rerun()
+nav_info.markdown(f"<p style='text-align:center;color:#888;'>Page {len(cursors)} of {pages}</p>", unsafe_allow_html=True)
+if nav_next.button("Older ➡️", disabled=next_cursor is None):
+    cursors.append(next_cursor)
+    st.rerun()
+
+# --- Download: built only when asked for, streamed from the store in chunks ---
+# the session keeps only the export's path; the file goes away once downloaded or out of date,
+# and export_file() prunes old ones left behind by sessions that ended first
+def drop_export():
+    ready = st.session_state.pop("history_export", None)
+    if ready and os.path.exists(ready[2]):
+        os.remove(ready[2])
+
 
-# --- Download ---
-csv = filtered.to_csv(index=False).encode('utf-8')
-st.download_button("📥 Download History CSV", csv, "workout_history.csv", "text/csv")
+fmt_col, prep_col = st.columns([1, 3])
+fmt = fmt_col.selectbox("Export format", available_formats(), label_visibility="collapsed")
+export_key = (user, tuple(selected), start, end, fmt)
+if prep_col.button("📦 Prepare download"):
+    drop_export()
+    with st.spinner("Exporting…"):
+        path, n = export_file(fmt, selected, start, end, user)
+    st.session_state.history_export = (export_key, n, path)
+ready = st.session_state.get("history_export")
+if ready and (ready[0] != export_key or not os.path.exists(ready[2])):
+    drop_export()
+    ready = None
+if ready:
+    ext, mime = FORMATS[fmt]
+    with open(ready[2], "rb") as f:
+        st.download_button(f"📥 Download {ready[1]} sessions ({fmt})", f, "workout_history" + ext, mime,
+                           on_click=drop_export)
 
 # --- Footer ---
 st.markdown("<hr><center style='color:#00FFFF;'>© 2025 FitAI — by Haris</center>", unsafe_allow_html=True)
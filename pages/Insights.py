@@ -1,20 +1,46 @@
+import time
+_t0 = time.perf_counter()
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-from utils import load_sessions, logo_html
+from datetime import date, timedelta
+from utils import exercise_stats, current_user, logo_html
+from timeseries import METRICS, chart_frame
+from rollups import PERIODS
+from startup import imports_done
+imports_done("Insights", _t0)
+
+RANGES = {"Last 30 days": 30, "Last 90 days": 90, "Last year": 365, "Last 2 years": 730, "All time": None}
 
 st.markdown(logo_html(), unsafe_allow_html=True)
 st.title("📈 Insights")
 
-data = load_sessions()
-if not data.empty:
+stats = exercise_stats(current_user())
+if not stats.empty:
     st.subheader("Average Reps by Exercise")
-    avg = data.groupby("exercise")["reps_or_seconds"].mean()
+    avg = stats.set_index("exercise")["mean"].rename("reps_or_seconds")
     st.bar_chart(avg)
 
-    st.subheader("Calories Trend")
-    data["date"] = pd.to_datetime(data["timestamp"]).dt.date
-    daily = data.groupby("date")["reps_or_seconds"].sum()
-    st.line_chart(daily)
+    st.subheader("Activity Trend")
+    c1, c2, c3 = st.columns(3)
+    span = c1.selectbox("Range", list(RANGES), index=1)
+    metric = c2.selectbox("Measure", list(METRICS), format_func=METRICS.get)
+    resolution = c3.selectbox("Resolution", ["auto", *PERIODS], format_func=str.capitalize)
+    c4, c5, c6 = st.columns(3)
+    exercises = c4.multiselect("Exercises", stats["exercise"].tolist())
+    smooth = c5.checkbox("Rolling average", value=True)
+    show_trend = c6.checkbox("Trend line", value=False)
+
+    # buckets come from the day/week/month rollups; long ranges are downsampled to a bounded number of points
+    end = date.today()
+    start = end - timedelta(days=RANGES[span] - 1) if RANGES[span] else None
+    df, picked, slope = chart_frame(metric, current_user(), exercises or None, start, end, resolution,
+                                    window="auto" if smooth else None, show_trend=show_trend)
+    if df.empty or not df.iloc[:, 0].any():
+        st.info("No sessions in this range.")
+    else:
+        st.line_chart(df)
+        caption = f"{len(df)} points · {picked} buckets"
+        if slope is not None:
+            caption += f" · trend {slope:+.1f} {METRICS[metric].lower()} per {picked}"
+        st.caption(caption)
 else:
     st.info("No data to generate insights yet.")
@@ -0,0 +1,63 @@
+import time
+_t0 = time.perf_counter()
+import streamlit as st
+import pandas as pd
+from utils import logo_html
+from perf import STAGES, tracked, load_exports, flatten
+from startup import imports_done, report
+from pose_backend import get_pose_pool
+imports_done("Performance", _t0)
+
+st.markdown(logo_html(), unsafe_allow_html=True)
+st.title("⏱️ Performance")
+
+live = st.checkbox("Live refresh (1 s)", value=False)
+st.selectbox("Histogram stage", STAGES + ("total",), index=len(STAGES), key="perf_hist_stage")
+body = st.empty()
+
+
+def render():
+    with body.container():
+        loops = tracked()
+        if not loops:
+            st.info("No workout has run in this server process yet. Start one on the Workout page.")
+        for i, stats in enumerate(loops):
+            s = stats.summary()
+            st.subheader(("🟢 " if s["active"] else "⚪ ") + (s["label"] or "Workout"))
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("FPS", s["fps"])
+            c2.metric("Frames", s["frames"])
+            c3.metric("Dropped", s["dropped"])
+            c4.metric("Queue depth", f"{s['queue_depth']} (max {s['max_queue_depth']})")
+            if not s["stages_ms"]:
+                continue
+            st.dataframe(pd.DataFrame(s["stages_ms"]).T.rename_axis("stage (ms)"), use_container_width=True)
+            if i == 0:
+                stage = st.session_state.get("perf_hist_stage", "total")
+                counts, edges = stats.histogram(stage)
+                st.caption(f"Latency histogram — {stage}, last {min(s['frames'], stats.capacity)} frames")
+                st.bar_chart(pd.Series(counts, index=[f"{e:.1f}" for e in edges[:-1]], name="frames"))
+
+
+render()
+
+with st.expander("Startup and pose model pool"):
+    rep = report()
+    st.caption(f"Server process up {rep['uptime_s']} s. Times in ms; 'imports <page>' is the import cost of each rerun.")
+    if rep["events_ms"]:
+        st.dataframe(pd.DataFrame(rep["events_ms"]).T.rename_axis("event"), use_container_width=True)
+    if rep["first_import_ms"]:
+        st.dataframe(pd.Series(rep["first_import_ms"], name="first import (ms)"), use_container_width=True)
+    st.json(get_pose_pool().stats())
+
+with st.expander("Exported sessions"):
+    rows = [flatten(e) for e in load_exports()]
+    if rows:
+        st.dataframe(pd.DataFrame(rows).sort_values("timestamp", ascending=False), use_container_width=True)
+    else:
+        st.caption("Stats are exported next to each saved session.")
+
+# the Workout loop runs in another session's script thread; poll its ring buffer until unticked
+while live:
+    time.sleep(1.0)
+    render()
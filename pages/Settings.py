@@ -1,11 +1,55 @@
+import time
+_t0 = time.perf_counter()
 import streamlit as st
-from utils import logo_html
+from utils import logo_html, cache_stats
+from delivery import FORMATS
+from pose_backend import load_profile, save_profile, has_profile, autotune, sample_frames, machine_key
+from startup import imports_done
+imports_done("Settings", _t0)
 
 st.markdown(logo_html(), unsafe_allow_html=True)
 st.title("⚙️ Settings")
 
-st.slider("Camera Index", 0, 3, key="camera_index")
+# Streamlit deletes a widget's state on pages that do not render the widget, so values read
+# elsewhere live under a plain key; the widget uses "_" + key and copies its value back on change
+DEFAULTS = {"user_name": "User", "camera_index": 0,
+            "video_width": 640, "video_quality": 70, "video_format": "JPEG", "ui_fps": 15}
+
+def _keep(key):
+    st.session_state[key] = st.session_state["_" + key]
+
+def _setting(key):
+    st.session_state["_" + key] = st.session_state.setdefault(key, DEFAULTS[key])
+    return dict(key="_" + key, on_change=_keep, args=(key,))
+
+st.text_input("Your name", **_setting("user_name"))
+st.slider("Camera Index", 0, 3, **_setting("camera_index"))
 st.checkbox("Beep Enabled", value=True, key="beep_enabled")
 st.checkbox("Voice Feedback", value=False, key="voice_enabled")
 
 st.success("✅ Settings saved automatically.")
+
+with st.expander("Video delivery"):
+    st.slider("Displayed width (px)", 320, 1280, step=80, **_setting("video_width"))
+    st.slider("Image quality", 30, 95, **_setting("video_quality"))
+    st.selectbox("Format", list(FORMATS), **_setting("video_format"))
+    st.slider("Max UI refresh (fps)", 5, 30, **_setting("ui_fps"))
+
+with st.expander("Pose model profile"):
+    st.caption(f"Machine: {machine_key()}" + ("" if has_profile() else " — not tuned yet, using defaults"))
+    st.json(load_profile())
+    target_fps = st.number_input("Target FPS", 5, 60, 24)
+    if st.button("Re-run autotune"):
+        with st.spinner("Benchmarking pose model settings…"):
+            frames = sample_frames(int(st.session_state.get("camera_index", 0)))
+            if frames:
+                best, tried = autotune(frames, float(target_fps))
+                save_profile(best)
+                st.success(f"Saved: complexity {best['model_complexity']}, "
+                           f"width {best['input_width'] or 'full'}, {best['fps']} fps")
+                st.dataframe(tried, use_container_width=True)
+            else:
+                st.error("Camera not available for benchmarking.")
+
+with st.expander("History cache"):
+    st.json(cache_stats())
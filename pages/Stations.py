@@ -0,0 +1,77 @@
+import time
+_t0 = time.perf_counter()
+import streamlit as st
+from utils import logo_html, current_user
+from counting import EXERCISES
+from stations import get_station_manager
+from startup import imports_done
+imports_done("Stations", _t0)
+
+st.markdown(logo_html(), unsafe_allow_html=True)
+st.title("🏟️ Stations")
+st.caption("Each station runs its own camera, pose model and counter in a separate process.")
+
+manager = get_station_manager()
+
+with st.expander("Add station", expanded=not manager.stations()):
+    with st.form("add_station"):
+        c1, c2 = st.columns(2)
+        source = c1.number_input("Camera index", 0, 9, 0)
+        exercise = c2.selectbox("Exercise", EXERCISES)
+        member = c1.text_input("Member", value=current_user())
+        target = c2.number_input("Target (reps or seconds)", 3, 2000, 12)
+        if st.form_submit_button("Start station"):
+            manager.add(int(source), exercise, member, int(target))
+
+stations = manager.stations()
+if not stations:
+    st.info("No stations running. Add one above.")
+    st.stop()
+
+totals = manager.totals()
+t1, t2, t3, t4 = st.columns(4)
+t1.metric("Stations", totals["stations"])
+t2.metric("Live", totals["live"])
+t3.metric("Sessions saved", totals["sessions"])
+t4.metric("Total reps / secs", totals["total"])
+
+live = st.checkbox("Live view", value=True)
+panels = {}
+cols = st.columns(2)
+for i, s in enumerate(stations):
+    with cols[i % 2]:
+        st.markdown(f"**#{s['id']} · {s['name']} · {s['exercise']}** — camera {s['source']}")
+        if st.button("Remove", key=f"remove_station_{s['id']}"):
+            manager.remove(s["id"])
+            st.rerun()
+        panels[s["id"]] = (st.empty(), st.empty())
+
+deliveries = {}
+
+
+def render():
+    from delivery import FrameDelivery
+    for s in manager.stations():
+        if s["id"] not in panels:
+            continue
+        image, status = panels[s["id"]]
+        line = f"Count {s['count']} · {s['status']} · {s['fps']} fps · {s['sessions']} sessions saved"
+        if s["error"]:
+            status.error(s["error"])
+        else:
+            status.caption(line)
+        frame = manager.frame(s["id"])
+        if frame is not None:
+            if s["id"] not in deliveries:
+                deliveries[s["id"]] = FrameDelivery(image, width=480, quality=60, max_fps=8)
+            delivery = deliveries[s["id"]]
+            shown = delivery.prepare(frame)
+            if shown is not None:
+                delivery.send(shown)
+
+
+render()
+# frames come from the worker processes; keep polling until the box is unticked or the page reruns
+while live and any(s["alive"] for s in manager.stations()):
+    time.sleep(0.05)
+    render()
@@ -0,0 +1,201 @@
+"""Per-stage timing of the live Workout loop.
+
+FrameStats keeps the last `capacity` frames in a fixed float32 ring buffer,
+one column per stage in STAGES. The hot path only adds to the current row
+and copies it into the ring at the end of the frame. It does not allocate,
+lock or format anything. Percentiles, FPS and histograms are computed when
+the Performance page asks for them.
+
+Every live loop registers its FrameStats with track(), so the Performance
+page can read them from any browser session in the same process. When a
+session is saved, export() writes the summary to data/perf/<session key>.json
+next to the record, together with the machine and the pose profile, so
+slow machines can be matched against miscounted reps.
+
+    python perf.py summary [--out perf.csv]
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+PERF_DIR = os.path.join("data", "perf")
+
+STAGES = ("capture", "convert", "inference", "count", "overlay", "push")
+STAGE_INDEX = {name: i for i, name in enumerate(STAGES)}
+
+PERCENTILES = (50, 95, 99)
+
+
+class FrameStats:
+
+    def __init__(self, label="", capacity=1024):
+        self.label = label
+        self.capacity = capacity
+        self._ms = np.zeros((capacity, len(STAGES)), dtype=np.float32)
+        self._ends = np.zeros(capacity, dtype=np.float64)
+        self._row = np.zeros(len(STAGES), dtype=np.float32)
+        self._mark = 0.0
+        self.frames = 0
+        self.dropped = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.started = time.time()
+        self.active = True
+
+    def add(self, stage, seconds):
+        # time spent in a stage for the current frame; stages may be added more than once
+        self._row[STAGE_INDEX[stage]] += seconds * 1000.0
+
+    def mark(self):
+        self._mark = time.perf_counter()
+
+    def lap(self, stage):
+        # time since the last mark()/lap() goes to stage
+        now = time.perf_counter()
+        self._row[STAGE_INDEX[stage]] += (now - self._mark) * 1000.0
+        self._mark = now
+
+    def queues(self, depth, dropped):
+        self.queue_depth = depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.dropped = dropped
+
+    def end_frame(self):
+        i = self.frames % self.capacity
+        self._ms[i] = self._row
+        self._ends[i] = time.perf_counter()
+        self._row[:] = 0.0
+        self.frames += 1
+
+    def window(self):
+        # (n, len(STAGES)) milliseconds of the frames still in the ring, oldest first
+        n = min(self.frames, self.capacity)
+        if self.frames <= self.capacity:
+            return self._ms[:n]
+        i = self.frames % self.capacity
+        return np.concatenate([self._ms[i:], self._ms[:i]])
+
+    @property
+    def fps(self):
+        n = min(self.frames, self.capacity)
+        if n < 2:
+            return 0.0
+        ends = self._ends[:n]
+        span = ends.max() - ends.min()
+        return (n - 1) / span if span > 0 else 0.0
+
+    def percentiles(self):
+        # {stage: {"p50", "p95", "p99", "mean"}} in milliseconds, plus "total" per frame
+        ms = self.window()
+        if not len(ms):
+            return {}
+        ms = np.column_stack([ms, ms.sum(axis=1)])
+        pct = np.percentile(ms, PERCENTILES, axis=0)
+        mean = ms.mean(axis=0)
+        return {stage: dict({f"p{p}": round(float(pct[k, j]), 2) for k, p in enumerate(PERCENTILES)},
+                            mean=round(float(mean[j]), 2))
+                for j, stage in enumerate(STAGES + ("total",))}
+
+    def histogram(self, stage, bins=30):
+        # (counts, bin edges in ms) for one stage over the window
+        ms = self.window()
+        col = ms.sum(axis=1) if stage == "total" else ms[:, STAGE_INDEX[stage]]
+        return np.histogram(col, bins=bins)
+
+    def summary(self):
+        return {"label": self.label, "frames": self.frames, "fps": round(self.fps, 1),
+                "dropped": self.dropped, "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth, "active": self.active,
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "stages_ms": self.percentiles()}
+
+    def export(self, record, extra=None, directory=PERF_DIR):
+        # writes the summary next to a saved session record; returns the path
+        from counting import session_key
+        from pose_backend import load_profile, machine_key
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, session_key(record) + ".json")
+        data = dict(self.summary(), session=record, machine=machine_key(), profile=load_profile(), **(extra or {}))
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+_live = OrderedDict()
+_live_lock = threading.Lock()
+_MAX_TRACKED = 8
+
+
+def track(label, capacity=1024):
+    # new FrameStats visible to the Performance page; the oldest finished ones are forgotten
+    stats = FrameStats(label, capacity)
+    with _live_lock:
+        _live[id(stats)] = stats
+        while len(_live) > _MAX_TRACKED:
+            done = [k for k, s in _live.items() if not s.active]
+            _live.pop(done[0] if done else next(iter(_live)))
+    return stats
+
+
+def tracked():
+    # live loops first, then recently finished ones, newest first
+    with _live_lock:
+        items = list(_live.values())[::-1]
+    return sorted(items, key=lambda s: not s.active)
+
+
+def load_exports(directory=PERF_DIR):
+    out = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path) as f:
+            out.append(json.load(f))
+    return out
+
+
+def flatten(export):
+    # one flat row per exported session, for spreadsheets and dataframes
+    s = export.get("session", {})
+    row = {"timestamp": s.get("timestamp"), "name": s.get("name"), "exercise": s.get("exercise"),
+           "reps_or_seconds": s.get("reps_or_seconds"), "machine": export.get("machine"),
+           "model_complexity": export.get("profile", {}).get("model_complexity"),
+           "fps": export.get("fps"), "frames": export.get("frames"), "dropped": export.get("dropped")}
+    for stage, pct in export.get("stages_ms", {}).items():
+        row[f"{stage}_p50"] = pct["p50"]
+        row[f"{stage}_p95"] = pct["p95"]
+    return row
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Frame-loop performance exports.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    summ = sub.add_parser("summary", help="one row per exported session")
+    summ.add_argument("--dir", default=PERF_DIR)
+    summ.add_argument("--out", help="write CSV here instead of stdout")
+    args = ap.parse_args(argv)
+
+    rows = [flatten(e) for e in load_exports(args.dir)]
+    if not rows:
+        print(f"No exports in {args.dir}.", file=sys.stderr)
+        return 1
+    fields = list(OrderedDict.fromkeys(k for r in rows for k in r))
+    f = open(args.out, "w", newline="") if args.out else sys.stdout
+    try:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    finally:
+        if args.out:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Frame sources for the live Workout loop.
+
+serial_frames() is the original read -> flip -> convert -> infer sequence.
+Pipeline runs capture and inference on their own threads, joined to the
+render stage (the Streamlit script thread) by bounded latest-frame-wins
+queues, so camera latency and model time overlap instead of adding up.
+Both take an optional perf.FrameStats and fill in the capture, convert and
+inference stages of each frame they yield.
+"""
+import queue
+import threading
+import time
+
+import cv2
+
+from geometry import SKELETON
+
+
+def estimate_landmarks(pose, frame):
+    # pose: a pose_backend.PoseBackend, or AdaptivePose around one
+    return pose.estimate(frame)
+
+
+def timed_landmarks(pose, frame):
+    # (lm, convert seconds, inference seconds); the backend reports its own conversion time
+    t0 = time.perf_counter()
+    lm = pose.estimate(frame)
+    total = time.perf_counter() - t0
+    convert = getattr(pose, "convert_s", 0.0)
+    return lm, convert, total - convert
+
+
+def draw_skeleton(frame, lm, min_visible=0.5, color=(0, 255, 200)):
+    # draws limbs and joints from a (33, 4) landmark array onto a BGR frame in place
+    h, w = frame.shape[:2]
+    pts = [(int(x * w), int(y * h)) for x, y in lm[:, :2]]
+    vis = lm[:, 3] >= min_visible
+    for a, b in SKELETON:
+        if vis[a] and vis[b]:
+            cv2.line(frame, pts[a], pts[b], color, 2)
+    for i in {i for edge in SKELETON for i in edge}:
+        if vis[i]:
+            cv2.circle(frame, pts[i], 4, (255, 255, 255), -1)
+
+
+def serial_frames(cap, pose, perf=None):
+    # yields (frame, lm) one after another; frame is None when the camera fails.
+    # perf: optional perf.FrameStats that gets capture / convert / inference times
+    while True:
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            yield None, None
+            return
+        t1 = time.perf_counter()
+        frame = cv2.flip(frame, 1)
+        t2 = time.perf_counter()
+        lm, convert, infer = timed_landmarks(pose, frame)
+        if perf is not None:
+            perf.add("capture", t1 - t0)
+            perf.add("convert", t2 - t1 + convert)
+            perf.add("inference", infer)
+        yield frame, lm
+
+
+class LatestQueue:
+    # bounded queue that drops the oldest item instead of blocking the producer
+
+    def __init__(self, maxsize=1):
+        self._q = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self._q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        return self._q.get(timeout=timeout)
+
+    def qsize(self):
+        return self._q.qsize()
+
+
+class FramePacer:
+    # paces the render stage to the rate results actually arrive, capped at max_fps
+
+    def __init__(self, max_fps=30, alpha=0.2):
+        self.min_interval = 1.0 / max_fps
+        self.alpha = alpha
+        self.interval = self.min_interval
+        self._last = None
+
+    def observe(self, produced_interval):
+        # feed the measured time between inference results
+        self.interval = max(self.min_interval,
+                            self.alpha * produced_interval + (1 - self.alpha) * self.interval)
+
+    def wait(self):
+        now = time.perf_counter()
+        if self._last is not None:
+            remaining = self.interval - (now - self._last)
+            if remaining > 0:
+                time.sleep(remaining)
+                now = time.perf_counter()
+        self._last = now
+
+    @property
+    def fps(self):
+        return 1.0 / self.interval
+
+
+class Pipeline:
+    # capture thread -> inference worker -> render stage (the caller's thread)
+
+    def __init__(self, cap, pose, max_fps=30, queue_size=1, perf=None):
+        self.cap = cap
+        self.pose = pose
+        self.perf = perf
+        self.frames = LatestQueue(queue_size)
+        self.results = LatestQueue(queue_size)
+        self.pacer = FramePacer(max_fps)
+        self.latency = 0.0
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture, name="fitai-capture", daemon=True),
+            threading.Thread(target=self._inference, name="fitai-inference", daemon=True),
+        ]
+
+    def _capture(self):
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                self.frames.put(None)
+                return
+            t1 = time.perf_counter()
+            frame = cv2.flip(frame, 1)
+            t2 = time.perf_counter()
+            self.frames.put((frame, t1, t1 - t0, t2 - t1))
+
+    def _inference(self):
+        last = None
+        while not self._stop.is_set():
+            try:
+                item = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                self.results.put(None)
+                return
+            frame, t_capture, capture_s, flip_s = item
+            lm, convert_s, infer_s = timed_landmarks(self.pose, frame)
+            now = time.perf_counter()
+            if last is not None:
+                self.pacer.observe(now - last)
+            last = now
+            # stage times travel with the frame and are recorded on the render thread
+            self.results.put((frame, lm, t_capture, (capture_s, flip_s + convert_s, infer_s)))
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=1.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def dropped(self):
+        return self.frames.dropped + self.results.dropped
+
+    def __iter__(self):
+        # same shape as serial_frames(); the wait keeps the script thread responsive to Stop
+        while not self._stop.is_set():
+            self.pacer.wait()
+            try:
+                item = self.results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                yield None, None
+                return
+            frame, lm, t_capture, (capture_s, convert_s, infer_s) = item
+            self.latency = time.perf_counter() - t_capture
+            if self.perf is not None:
+                self.perf.add("capture", capture_s)
+                self.perf.add("convert", convert_s)
+                self.perf.add("inference", infer_s)
+                self.perf.queues(self.frames.qsize() + self.results.qsize(), self.dropped)
+            yield frame, lm
@@ -0,0 +1,92 @@
+"""Batch generation of next-session targets and 7-day plans for every member.
+
+    python plans.py                  # recompute every user
+    python plans.py --incremental    # only users with new sessions since their last plan
+    python plans.py --workers 8
+
+Users are split into partitions that run on a process pool. Each worker reads
+only its own users' rows through the store's name index. Results go to the
+store's plans table, and the Dashboard reads its user's row by key.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+
+def to_payload(rec):
+    out = dict(rec)
+    out["stats"] = rec["stats"].to_dict("records")
+    return json.dumps(out)
+
+
+def from_payload(text):
+    import pandas as pd
+    rec = json.loads(text)
+    rec["stats"] = pd.DataFrame(rec["stats"])
+    return rec
+
+
+def _plan_partition(marks, today):
+    # marks: {name: latest session mark seen by the parent}; returns rows for store.put_plans
+    from recommend import recommend_from_history
+    from store import get_store
+    store = get_store()
+    computed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    for name, mark in marks.items():
+        rec = recommend_from_history(store.query(name=name), today=date.fromisoformat(today))
+        if "stats" in rec:
+            rows.append((name, computed_at, mark, to_payload(rec)))
+    return rows
+
+
+def stale_users(store, incremental=True):
+    marks = store.user_marks()
+    if not incremental:
+        return marks
+    done = store.plan_marks()
+    return {n: m for n, m in marks.items() if m > done.get(n, -1)}
+
+
+def run(store, incremental=False, workers=None, today=None):
+    # recompute plans and write them to the store; returns the number of users planned
+    todo = stale_users(store, incremental)
+    if not todo:
+        return 0
+    today = (today or date.today()).isoformat()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+    names = sorted(todo)
+    # a few partitions per worker keeps the pool busy when users have uneven history sizes
+    parts = [names[i::workers * 4] for i in range(min(len(names), workers * 4))]
+    if workers == 1:
+        results = [_plan_partition({n: todo[n] for n in part}, today) for part in parts]
+    else:
+        # spawn, not fork: a forked child would inherit the parent's store, its SQLite
+        # connection and writer thread; each spawned worker opens its own through get_store()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            results = list(pool.map(_plan_partition, [{n: todo[n] for n in part} for part in parts],
+                                    [today] * len(parts)))
+    rows = [r for part in results for r in part]
+    store.put_plans(rows)
+    return len(rows)
+
+
+def main(argv=None):
+    from store import get_store
+    ap = argparse.ArgumentParser(description="Precompute targets and 7-day plans for every user.")
+    ap.add_argument("--incremental", action="store_true", help="only users with sessions since their last plan")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="process pool size")
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    n = run(get_store(), args.incremental, args.workers)
+    print(f"Planned {n} users in {time.perf_counter() - t0:.1f}s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
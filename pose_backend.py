@@ -0,0 +1,320 @@
+"""Pose-estimation backends and a per-machine autotuner.
+
+A backend turns a BGR frame into a (33, 4) landmark array (see geometry.py),
+or None when nobody is visible. MediaPipeBackend exposes model complexity,
+input resolution and OpenCV thread count. autotune() benchmarks candidate
+configurations on sample frames and keeps the best-quality one that meets a
+target FPS. The chosen profile is stored per machine in
+data/pose_profile.json, so each machine in the fleet keeps its own settings.
+
+Loading a model graph is slow, so the Workout page leases backends from a
+process-wide PosePool (get_pose_pool()) instead of building one per Start.
+Idle backends are kept warm for reuse across reruns and sessions and are
+closed after idle_s seconds.
+
+    python pose_backend.py autotune [--camera 0 | --video clip.mp4] [--target-fps 24]
+    python pose_backend.py show
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from geometry import landmarks_to_array
+from startup import timed_import
+
+PROFILE_PATH = os.path.join("data", "pose_profile.json")
+
+DEFAULT_PROFILE = {"backend": "mediapipe", "model_complexity": 1, "input_width": None, "num_threads": None}
+
+# best quality first; autotune() keeps the first one that is fast enough
+CANDIDATES = [
+    {"backend": "mediapipe", "model_complexity": 2, "input_width": None},
+    {"backend": "mediapipe", "model_complexity": 1, "input_width": None},
+    {"backend": "mediapipe", "model_complexity": 1, "input_width": 640},
+    {"backend": "mediapipe", "model_complexity": 1, "input_width": 480},
+    {"backend": "mediapipe", "model_complexity": 0, "input_width": 640},
+    {"backend": "mediapipe", "model_complexity": 0, "input_width": 480},
+    {"backend": "mediapipe", "model_complexity": 0, "input_width": 320},
+]
+
+
+class PoseBackend:
+    # seconds the last estimate() spent resizing / converting the frame before the model ran
+    convert_s = 0.0
+
+    def estimate(self, frame):
+        # BGR frame -> (33, 4) frame-normalized landmarks, or None
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MediaPipeBackend(PoseBackend):
+
+    def __init__(self, model_complexity=1, input_width=None, num_threads=None,
+                 min_detection_confidence=0.6, min_tracking_confidence=0.6):
+        cv2 = timed_import("cv2")
+        mp = timed_import("mediapipe")
+        self._cv2 = cv2
+        self.input_width = input_width
+        if num_threads:
+            # MediaPipe's Python API has no interpreter thread knob; this bounds OpenCV's pre-processing
+            cv2.setNumThreads(int(num_threads))
+        self._pose = mp.solutions.pose.Pose(model_complexity=model_complexity,
+                                            min_detection_confidence=min_detection_confidence,
+                                            min_tracking_confidence=min_tracking_confidence)
+
+    def estimate(self, frame):
+        cv2 = self._cv2
+        t0 = time.perf_counter()
+        h, w = frame.shape[:2]
+        if self.input_width and w > self.input_width:
+            frame = cv2.resize(frame, (self.input_width, int(h * self.input_width / w)),
+                               interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        self.convert_s = time.perf_counter() - t0
+        # landmarks are normalized, so they stay valid for the full-size frame
+        return landmarks_to_array(self._pose.process(rgb).pose_landmarks)
+
+    def close(self):
+        self._pose.close()
+
+
+BACKENDS = {"mediapipe": MediaPipeBackend}
+
+
+def make_backend(profile=None):
+    profile = dict(DEFAULT_PROFILE, **(profile or {}))
+    cls = BACKENDS[profile.pop("backend")]
+    return cls(**{k: v for k, v in profile.items() if k in ("model_complexity", "input_width", "num_threads")})
+
+
+def machine_key():
+    return f"{platform.node()}|{platform.machine()}|{platform.processor() or '-'}|{os.cpu_count()}"
+
+
+def _read_profiles():
+    if not os.path.exists(PROFILE_PATH):
+        return {}
+    with open(PROFILE_PATH) as f:
+        return json.load(f)
+
+
+def has_profile():
+    return machine_key() in _read_profiles()
+
+
+def load_profile():
+    # this machine's tuned profile, or the default when it was never tuned
+    return _read_profiles().get(machine_key(), dict(DEFAULT_PROFILE))
+
+
+def save_profile(profile):
+    profiles = _read_profiles()
+    profiles[machine_key()] = profile
+    os.makedirs(os.path.dirname(PROFILE_PATH), exist_ok=True)
+    with open(PROFILE_PATH, "w") as f:
+        json.dump(profiles, f, indent=2)
+
+
+def benchmark(profile, frames, warmup=3):
+    # frames per second for one configuration over the sample frames
+    with make_backend(profile) as backend:
+        for frame in frames[:warmup]:
+            backend.estimate(frame)
+        t0 = time.perf_counter()
+        for frame in frames:
+            backend.estimate(frame)
+        return len(frames) / (time.perf_counter() - t0)
+
+
+def autotune(frames, target_fps=24.0, candidates=None, num_threads=None, log=None):
+    # best-quality candidate that reaches target_fps; the fastest one if none does
+    results = []
+    for cand in candidates or CANDIDATES:
+        profile = dict(cand, num_threads=num_threads or os.cpu_count())
+        fps = benchmark(profile, frames)
+        results.append(dict(profile, fps=round(fps, 1)))
+        if log:
+            log(results[-1])
+        if fps >= target_fps:
+            break
+    ok = [r for r in results if r["fps"] >= target_fps]
+    best = ok[0] if ok else max(results, key=lambda r: r["fps"])
+    best["target_fps"] = target_fps
+    best["tuned_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    return best, results
+
+
+class PosePool:
+    # warmed backends shared by every Streamlit session, keyed by model settings
+
+    def __init__(self, idle_s=600.0, max_idle=2):
+        self.idle_s = idle_s
+        self.max_idle = max_idle      # per settings key; extra returns are closed
+        self._idle = {}               # key -> [(backend, released_at)]
+        self._warming = set()
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    @staticmethod
+    def _key(profile):
+        profile = dict(DEFAULT_PROFILE, **(profile or {}))
+        return tuple(profile[k] for k in ("backend", "model_complexity", "input_width", "num_threads"))
+
+    def _create(self, profile):
+        import numpy as np
+        backend = make_backend(profile)
+        # the first estimate() finishes loading the graph; do it before anyone waits on a frame
+        backend.estimate(np.zeros((240, 320, 3), dtype=np.uint8))
+        with self._lock:
+            self.created += 1
+        return backend
+
+    def acquire(self, profile=None):
+        key = self._key(profile)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return idle.pop()[0]
+        return self._create(profile)
+
+    def release(self, backend, profile=None):
+        key = self._key(profile)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append((backend, time.monotonic()))
+                backend = None
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="fitai-pose-reaper", daemon=True)
+                self._reaper.start()
+        if backend is not None:
+            backend.close()
+
+    @contextmanager
+    def lease(self, profile=None):
+        backend = self.acquire(profile)
+        try:
+            yield backend
+        finally:
+            self.release(backend, profile)
+
+    def prewarm(self, profile=None):
+        # builds one idle backend in the background unless one is already there or on its way
+        key = self._key(profile)
+        with self._lock:
+            if self._idle.get(key) or key in self._warming:
+                return
+            self._warming.add(key)
+
+        def warm():
+            try:
+                self.release(self._create(profile), profile)
+            except Exception as e:
+                print(f"FitAI pose pool: prewarm failed: {e}", file=sys.stderr)
+            finally:
+                with self._lock:
+                    self._warming.discard(key)
+        threading.Thread(target=warm, name="fitai-pose-prewarm", daemon=True).start()
+
+    def evict(self, max_age=None):
+        # closes backends idle for longer than max_age (default idle_s); returns how many
+        max_age = self.idle_s if max_age is None else max_age
+        cutoff = time.monotonic() - max_age
+        stale = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                stale += [b for b, t in idle if t <= cutoff]
+                idle[:] = [(b, t) for b, t in idle if t > cutoff]
+            self.evicted += len(stale)
+        for backend in stale:
+            backend.close()
+        return len(stale)
+
+    def _reap(self):
+        while True:
+            time.sleep(min(60.0, self.idle_s / 2))
+            self.evict()
+
+    def stats(self):
+        with self._lock:
+            idle = sum(len(v) for v in self._idle.values())
+            return {"idle": idle, "warming": len(self._warming), "created": self.created,
+                    "reused": self.reused, "evicted": self.evicted, "idle_timeout_s": self.idle_s}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pose_pool():
+    # process-wide pool; FITAI_POSE_IDLE_S sets how long an unused model stays loaded
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PosePool(float(os.environ.get("FITAI_POSE_IDLE_S", 600)))
+        return _pool
+
+
+def sample_frames(camera=0, video=None, n=40, cap=None):
+    # n mirrored frames from a camera index, a clip, or an already open capture (left open)
+    cv2 = timed_import("cv2")
+    own = cap is None
+    if own:
+        cap = cv2.VideoCapture(video if video else camera)
+    frames = []
+    try:
+        while len(frames) < n:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.flip(frame, 1))
+    finally:
+        if own:
+            cap.release()
+    return frames
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Tune pose estimation for this machine.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    tune = sub.add_parser("autotune", help="benchmark configurations and save the best one")
+    tune.add_argument("--camera", type=int, default=0)
+    tune.add_argument("--video", help="sample frames from a clip instead of the camera")
+    tune.add_argument("--target-fps", type=float, default=24.0)
+    sub.add_parser("show", help="print this machine's profile")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "show":
+        print(machine_key())
+        print(json.dumps(load_profile(), indent=2))
+        return 0
+    frames = sample_frames(args.camera, args.video)
+    if not frames:
+        print("No frames to benchmark on.", file=sys.stderr)
+        return 1
+    best, _ = autotune(frames, args.target_fps, log=lambda r: print(r))
+    save_profile(best)
+    print(f"Saved profile for {machine_key()}: {best}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
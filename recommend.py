@@ -0,0 +1,112 @@
+"""Next-session targets and a 7-day mini plan from workout history.
+
+Everything per exercise comes out of one grouped pass: the summary stats and
+the trend, an OLS slope of daily mean reps against day index solved in
+closed form rather than with one np.polyfit per exercise. Results are
+memoized on the store version; given a loader instead of a frame, Streamlit
+reruns that don't add sessions cost a dict lookup and never touch the history.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# slope (reps per active day) above / below which an exercise counts as improving / declining
+TREND_UP, TREND_DOWN = 0.2, -0.2
+
+_memo = OrderedDict()
+_MEMO_SIZE = 16
+
+
+def trend_slopes(df):
+    # per-exercise OLS slope of daily mean reps over day index 0..n-1; 0 with fewer than two days
+    day = df["timestamp"].astype(str).str[:10]
+    daily = df.groupby([df["exercise"], day])["reps_or_seconds"].mean()
+    ex = daily.index.get_level_values(0)
+    x = daily.groupby(level=0).cumcount().to_numpy(dtype=float)
+    y = daily.to_numpy(dtype=float)
+    sums = pd.DataFrame({"y": y, "xy": x * y}, index=ex).groupby(level=0).agg(["sum", "size"])
+    n = sums[("y", "size")].to_numpy(dtype=float)
+    sy, sxy = sums[("y", "sum")].to_numpy(), sums[("xy", "sum")].to_numpy()
+    sx = n * (n - 1) / 2
+    sxx = (n - 1) * n * (2 * n - 1) / 6
+    den = n * sxx - sx ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(n >= 2, (n * sxy - sx * sy) / den, 0.0)
+    return pd.Series(slope, index=sums.index)
+
+
+def _compute(df, today):
+    stats = df.groupby("exercise")["reps_or_seconds"].agg(["mean", "median", "sum", "count"]).rename(columns={
+        "mean": "avg", "median": "med", "sum": "total", "count": "sessions"
+    })
+
+    avg_sorted = stats["avg"].sort_values()
+    weakest = avg_sorted.index[0] if not avg_sorted.empty else None
+    strongest = avg_sorted.index[-1] if not avg_sorted.empty else None
+
+    slopes = trend_slopes(df)
+    # keep first-seen order so the summary text reads the same as before
+    trends = {ex: float(slopes[ex]) for ex in pd.unique(df["exercise"])}
+
+    # +10% when trending up, +3% when trending down, +6% otherwise
+    s = slopes.reindex(stats.index).to_numpy()
+    bump = np.select([s > TREND_UP, s < TREND_DOWN], [1.10, 1.03], 1.06)
+    suggested = np.maximum(1, np.round(stats["avg"].to_numpy(dtype=float) * bump)).astype(int)
+    next_targets = dict(zip(stats.index, (int(v) for v in suggested)))
+
+    # 3 sessions over the coming 7 days (today, +2, +4): weakest, another exercise, strongest
+    others = [e for e in stats.index if e != weakest]
+    picks = [weakest, others[0] if others else weakest, strongest if strongest else weakest]
+    plan = [{
+        "date": (today + timedelta(days=d)).strftime("%Y-%m-%d"),
+        "exercise": ex,
+        "recommended_reps_or_secs": next_targets.get(ex, 10),
+        "note": "Focus on form + controlled tempo",
+    } for d, ex in zip((0, 2, 4), picks)]
+
+    rec_text = [
+        f"Your weakest exercise is **{weakest}** (avg {stats.loc[weakest, 'avg']:.1f}).",
+        f"Your strongest exercise is **{strongest}** (avg {stats.loc[strongest, 'avg']:.1f}).",
+    ]
+    improving = [e for e, v in trends.items() if v > TREND_UP]
+    declining = [e for e, v in trends.items() if v < TREND_DOWN]
+    if improving:
+        rec_text.append(f"Improving recently at: {', '.join(improving)}.")
+    if declining:
+        rec_text.append(f"Needs attention (declining): {', '.join(declining)}.")
+    rec_text.append("Next session targets provided below. Aim for consistent form — not speed.")
+
+    return {
+        "stats": stats.reset_index(),
+        "weakest": weakest,
+        "strongest": strongest,
+        "trends": trends,
+        "next_targets": next_targets,
+        "mini_plan": plan,
+        "note": "Auto-generated from your last sessions (local).",
+        "text": "\n".join(rec_text),
+    }
+
+
+def recommend_from_history(df, version=None, today=None, scope=None):
+    # df columns: timestamp, exercise, reps_or_seconds; or a function returning that frame, called
+    # only when the memo misses. With a version the result is memoized; scope tells apart
+    # different slices (e.g. users) of the same history version.
+    today = today or datetime.now().date()
+    key = (scope, version, today)
+    if version is not None and key in _memo:
+        _memo.move_to_end(key)
+        return _memo[key]
+    if callable(df):
+        df = df()
+    if df is None or df.empty:
+        rec = {"note": "No data yet — do a few workouts to unlock recommendations."}
+    else:
+        rec = _compute(df, today)
+    if version is not None:
+        _memo[key] = rec
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return rec
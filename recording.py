@@ -0,0 +1,205 @@
+"""Landmark recordings of live sessions, and replay of them through the rep counters.
+
+A recording is one append-only binary file per session. It starts with a
+16-byte header (magic, landmark count, values per landmark). After that come
+fixed-size frames: a float64 timestamp and (33, 4) float32 landmarks, NaN
+when nobody was in frame. Frames are appended with plain buffered writes,
+536 bytes each. Readers map the file with np.memmap, so a session is never
+parsed or copied before its features are computed.
+
+While a workout runs, the file has a temporary name. Recorder.finish(record)
+renames it to data/recordings/<session key>.lmk and writes <key>.json with
+the saved record, the counter start time and the frame count.
+
+replay() re-scores any number of recordings with CounterBank, optionally
+with spec overrides. Recordings are bucketed by length and stepped together
+without video decode or inference, so thresholds can be re-tuned against
+the whole recorded history:
+
+    python recording.py list
+    python recording.py replay [--exercise Squats] [--specs overrides.json] [--out rescored.csv]
+
+overrides.json holds partial specs merged over counting.SPECS, e.g.
+{"Squats": {"fire": [["knee", "<", 100]]}}.
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import struct
+import sys
+import uuid
+
+import numpy as np
+
+from geometry import N_LANDMARKS
+
+REC_DIR = os.path.join("data", "recordings")
+MAGIC = b"FITLMK01"
+HEADER = struct.Struct("<8sII")
+FRAME = np.dtype([("t", "<f8"), ("lm", "<f4", (N_LANDMARKS, 4))])
+
+
+class Recorder:
+
+    def __init__(self, exercise, start_time, directory=REC_DIR):
+        self.exercise = exercise
+        self.start_time = start_time
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"live-{uuid.uuid4().hex}.lmk.part")
+        self._f = open(self.path, "wb")
+        self._f.write(HEADER.pack(MAGIC, N_LANDMARKS, 4))
+        self._frame = np.zeros(1, dtype=FRAME)
+        self.frames = 0
+
+    def add(self, t, lm):
+        # one frame; lm is a (33, 4) array or None when nobody was seen
+        self._frame["t"] = t
+        if lm is None:
+            self._frame["lm"] = np.nan
+        else:
+            self._frame["lm"] = lm
+        self._f.write(self._frame.tobytes())
+        self.frames += 1
+
+    def finish(self, record, meta=None):
+        # ties the recording to a saved session record; returns the final path
+        from counting import session_key
+        self._f.close()
+        key = session_key(record)
+        path = os.path.join(self.directory, key + ".lmk")
+        os.replace(self.path, path)
+        info = dict(meta or {}, key=key, session=record, exercise=self.exercise,
+                    start_time=self.start_time, frames=self.frames)
+        with open(os.path.join(self.directory, key + ".json"), "w") as f:
+            json.dump(info, f, indent=2)
+        self.path = path
+        return path
+
+    def discard(self):
+        if not self._f.closed:
+            self._f.close()
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # a recording that was never tied to a session is dropped
+        self.discard()
+
+
+def load(path):
+    # (times (T,), landmarks (T, 33, 4)) as read-only views into the mapped file
+    with open(path, "rb") as f:
+        magic, n, dims = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or n != N_LANDMARKS or dims != 4:
+        raise ValueError(f"Not a landmark recording: {path}")
+    size = os.path.getsize(path) - HEADER.size
+    if size < FRAME.itemsize:
+        return np.zeros(0), np.zeros((0, N_LANDMARKS, 4), dtype=np.float32)
+    # a frame cut short by a crash is ignored
+    frames = np.memmap(path, dtype=FRAME, mode="r", offset=HEADER.size, shape=(size // FRAME.itemsize,))
+    return frames["t"], frames["lm"]
+
+
+def list_recordings(directory=REC_DIR, exercise=None):
+    # sidecar metadata of every finished recording, oldest first, with "path" added
+    out = []
+    for meta_path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(meta_path) as f:
+            info = json.load(f)
+        info["path"] = meta_path[:-len(".json")] + ".lmk"
+        if os.path.exists(info["path"]) and (exercise is None or info["exercise"] == exercise):
+            out.append(info)
+    return out
+
+
+def override_specs(overrides):
+    # counting.SPECS with partial per-exercise specs merged over it
+    from counting import SPECS
+    specs = copy.deepcopy(SPECS)
+    for ex, spec in (overrides or {}).items():
+        if ex not in specs:
+            raise ValueError(f"Unknown exercise: {ex}")
+        specs[ex].update({k: tuple(map(tuple, v)) if k in ("arm", "fire", "hold") else v for k, v in spec.items()})
+    return specs
+
+
+def replay(recordings, specs=None, batch=256):
+    # recordings: list_recordings() entries. Returns one count per recording, in order.
+    from counting import CounterBank
+    from geometry import FEATURES, features
+    counts = np.zeros(len(recordings), dtype=np.int64)
+    # similar lengths share a bank, so little stepping is wasted on padding
+    order = sorted(range(len(recordings)), key=lambda i: recordings[i]["frames"])
+    for b in range(0, len(order), batch):
+        idx = order[b:b + batch]
+        loaded = [load(recordings[i]["path"]) for i in idx]
+        steps = max(len(t) for t, _ in loaded)
+        if steps == 0:
+            continue
+        feats = np.full((steps, len(idx), len(FEATURES)), np.nan)
+        times = np.zeros((steps, len(idx)))
+        for j, (t, lm) in enumerate(loaded):
+            feats[:len(t), j] = features(lm)
+            times[:len(t), j] = t
+        bank = CounterBank([recordings[i]["exercise"] for i in idx],
+                           [recordings[i].get("start_time", 0.0) for i in idx], specs)
+        counts[idx] = bank.run(feats, times)
+    return counts
+
+
+def rescore(recordings, specs=None):
+    # saved vs replayed count per recording, as a DataFrame
+    import pandas as pd
+    counts = replay(recordings, specs)
+    rows = [{"key": r["key"], "name": r["session"].get("name"), "exercise": r["exercise"],
+             "timestamp": r["session"].get("timestamp"), "frames": r["frames"],
+             "saved": int(r["session"].get("reps_or_seconds", 0)), "replayed": int(c)}
+            for r, c in zip(recordings, counts)]
+    df = pd.DataFrame(rows, columns=["key", "name", "exercise", "timestamp", "frames", "saved", "replayed"])
+    df["diff"] = df["replayed"] - df["saved"]
+    return df
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Landmark recordings: list and re-score.")
+    ap.add_argument("--dir", default=REC_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="finished recordings")
+    rep = sub.add_parser("replay", help="re-run rep counting over recordings")
+    rep.add_argument("--exercise")
+    rep.add_argument("--specs", help="JSON file of partial specs merged over counting.SPECS")
+    rep.add_argument("--out", help="write the per-recording comparison to this CSV")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "list":
+        for r in list_recordings(args.dir):
+            print(f"{r['key']}: {r['exercise']}, {r['frames']} frames, saved {r['session'].get('reps_or_seconds')}")
+        return 0
+    recs = list_recordings(args.dir, args.exercise)
+    if not recs:
+        print("No recordings to replay.", file=sys.stderr)
+        return 1
+    overrides = None
+    if args.specs:
+        with open(args.specs) as f:
+            overrides = json.load(f)
+    import time
+    t0 = time.perf_counter()
+    df = rescore(recs, override_specs(overrides) if overrides else None)
+    wall = time.perf_counter() - t0
+    print(df.to_string(index=False))
+    frames = int(df["frames"].sum())
+    print(f"{len(df)} recordings, {frames} frames in {wall:.2f}s ({frames / wall:,.0f} frames/s); "
+          f"{int((df['diff'] != 0).sum())} counts changed.")
+    if args.out:
+        df.to_csv(args.out, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
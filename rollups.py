@@ -0,0 +1,221 @@
+"""Materialized aggregates kept up to date by every save_session().
+
+Tables, all keyed by user name and exercise:
+    rollup_exercise  sessions, total and duration per exercise
+    rollup_values    value histogram per exercise (exact median sketch)
+    rollup_day       sessions, total and duration per day
+    rollup_week      the same per ISO week (keyed by its Monday)
+    rollup_month     the same per calendar month (keyed by its first day)
+
+apply() folds a batch of new records in inside the writer's transaction, so
+the Dashboard and Insights read O(#exercises + #days) rows instead of
+scanning history. frame_*() compute the same tables from a raw DataFrame;
+they back the CSV store and the consistency check.
+
+    python rollups.py rebuild    # regenerate from the raw sessions table
+    python rollups.py check      # compare incremental tables with a full rebuild
+"""
+import argparse
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_exercise (
+    name TEXT NOT NULL, exercise TEXT NOT NULL, sessions INTEGER, total REAL, duration REAL,
+    PRIMARY KEY (name, exercise));
+CREATE TABLE IF NOT EXISTS rollup_values (
+    name TEXT NOT NULL, exercise TEXT NOT NULL, value REAL NOT NULL, n INTEGER,
+    PRIMARY KEY (name, exercise, value));
+CREATE TABLE IF NOT EXISTS rollup_day (
+    name TEXT NOT NULL, day TEXT NOT NULL, exercise TEXT NOT NULL, sessions INTEGER, total REAL, duration REAL,
+    PRIMARY KEY (name, day, exercise));
+CREATE TABLE IF NOT EXISTS rollup_week (
+    name TEXT NOT NULL, week TEXT NOT NULL, exercise TEXT NOT NULL, sessions INTEGER, total REAL, duration REAL,
+    PRIMARY KEY (name, week, exercise));
+CREATE TABLE IF NOT EXISTS rollup_month (
+    name TEXT NOT NULL, month TEXT NOT NULL, exercise TEXT NOT NULL, sessions INTEGER, total REAL, duration REAL,
+    PRIMARY KEY (name, month, exercise));
+"""
+
+TABLES = ("rollup_exercise", "rollup_values", "rollup_day", "rollup_week", "rollup_month")
+PERIODS = ("day", "week", "month")
+# keys are NOT NULL: a NULL key never matches ON CONFLICT and would add a duplicate row per batch
+VERSION = "3"
+
+
+def _num(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def week_of(day):
+    # "YYYY-MM-DD" -> Monday of that ISO week, same format
+    d = date.fromisoformat(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+def month_of(day):
+    # "YYYY-MM-DD" -> first day of that month, same format
+    return day[:7] + "-01"
+
+
+def period_of(day, period):
+    return day if period == "day" else week_of(day) if period == "week" else month_of(day)
+
+
+def apply(conn, records):
+    # fold new session records into the rollup tables (caller owns the transaction)
+    ex, vals = defaultdict(lambda: [0, 0.0, 0.0]), defaultdict(int)
+    days, weeks, months = (defaultdict(lambda: [0, 0.0, 0.0]) for _ in range(3))
+    for r in records:
+        name, exercise = r.get("name"), r.get("exercise")
+        reps, dur = _num(r.get("reps_or_seconds")), _num(r.get("duration_s"))
+        day = str(r.get("timestamp"))[:10]
+        for acc in (ex[name, exercise], days[name, day, exercise], weeks[name, week_of(day), exercise],
+                    months[name, month_of(day), exercise]):
+            acc[0] += 1
+            acc[1] += reps
+            acc[2] += dur
+        vals[name, exercise, reps] += 1
+    upsert = "ON CONFLICT DO UPDATE SET sessions = sessions + excluded.sessions, " \
+             "total = total + excluded.total, duration = duration + excluded.duration"
+    conn.executemany(f"INSERT INTO rollup_exercise VALUES (?, ?, ?, ?, ?) {upsert}",
+                     [k + tuple(v) for k, v in ex.items()])
+    conn.executemany(f"INSERT INTO rollup_day VALUES (?, ?, ?, ?, ?, ?) {upsert}",
+                     [k + tuple(v) for k, v in days.items()])
+    conn.executemany(f"INSERT INTO rollup_week VALUES (?, ?, ?, ?, ?, ?) {upsert}",
+                     [k + tuple(v) for k, v in weeks.items()])
+    conn.executemany(f"INSERT INTO rollup_month VALUES (?, ?, ?, ?, ?, ?) {upsert}",
+                     [k + tuple(v) for k, v in months.items()])
+    conn.executemany("INSERT INTO rollup_values VALUES (?, ?, ?, ?) ON CONFLICT DO UPDATE SET n = n + excluded.n",
+                     [k + (n,) for k, n in vals.items()])
+
+
+def rebuild(conn):
+    # regenerate every rollup table from the raw sessions table (caller owns the transaction).
+    # Tables are recreated, so a database from an older VERSION also picks up schema changes.
+    for t in TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {t}")
+    for statement in SCHEMA.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    reps, dur = "CAST(reps_or_seconds AS REAL)", "CAST(duration_s AS REAL)"
+    agg = f"COUNT(*), TOTAL({reps}), TOTAL({dur})"
+    # same keys as apply(): missing names/exercises as "", rows without a readable day left out
+    src = "(SELECT COALESCE(name, '') AS name, COALESCE(exercise, '') AS exercise, " \
+          "substr(timestamp, 1, 10) AS day, reps_or_seconds, duration_s FROM sessions " \
+          "WHERE date(substr(timestamp, 1, 10)) IS NOT NULL)"
+    conn.execute(f"INSERT INTO rollup_exercise SELECT name, exercise, {agg} FROM {src} GROUP BY 1, 2")
+    conn.execute(f"INSERT INTO rollup_values SELECT name, exercise, {reps}, COUNT(*) FROM {src} GROUP BY 1, 2, 3")
+    conn.execute(f"INSERT INTO rollup_day SELECT name, day, exercise, {agg} FROM {src} GROUP BY 1, 2, 3")
+    # SQLite's %w is 0 for Sunday; shift so weeks start on Monday like week_of()
+    conn.execute(f"INSERT INTO rollup_week SELECT name, "
+                 "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days'), "
+                 f"exercise, {agg} FROM {src} GROUP BY 1, 2, 3")
+    conn.execute(f"INSERT INTO rollup_month SELECT name, substr(day, 1, 7) || '-01', exercise, {agg} "
+                 f"FROM {src} GROUP BY 1, 2, 3")
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('rollups', ?)", (VERSION,))
+
+
+# --- readers: shape the stored tables for the pages ---------------------------------
+
+def _median(hist):
+    # hist: DataFrame of value, n for one exercise
+    hist = hist.sort_values("value")
+    cum = hist["n"].cumsum().to_numpy()
+    total = cum[-1]
+    lo = hist["value"].to_numpy()[(cum >= (total + 1) // 2).argmax()]
+    hi = hist["value"].to_numpy()[(cum >= total // 2 + 1).argmax()]
+    return (lo + hi) / 2.0
+
+
+def exercise_stats(per_exercise, values):
+    # per-exercise sessions/total/mean/median over the (already name-filtered) rollup rows
+    import pandas as pd
+    if per_exercise.empty:
+        return pd.DataFrame(columns=["exercise", "sessions", "total", "duration", "mean", "median"])
+    out = per_exercise.groupby("exercise")[["sessions", "total", "duration"]].sum()
+    out["mean"] = out["total"] / out["sessions"]
+    hist = values.groupby(["exercise", "value"], as_index=False)["n"].sum()
+    out["median"] = hist.groupby("exercise")[["value", "n"]].apply(_median)
+    return out.reset_index()
+
+
+def _rows(df):
+    # raw rows keyed the way apply() keys them; rows without a readable day are left out
+    import pandas as pd
+    day = df["timestamp"].astype(str).str[:10]
+    ok = pd.to_datetime(day, format="%Y-%m-%d", errors="coerce").notna()
+    return df[ok].assign(name=df["name"].fillna("").astype(str), exercise=df["exercise"].fillna("").astype(str))
+
+
+def frame_exercise(df):
+    import pandas as pd
+    df = _rows(df)
+    if df.empty:
+        return pd.DataFrame(columns=["name", "exercise", "sessions", "total", "duration"]), \
+            pd.DataFrame(columns=["name", "exercise", "value", "n"])
+    reps, dur = pd.to_numeric(df["reps_or_seconds"]).astype(float), pd.to_numeric(df["duration_s"]).astype(float)
+    g = pd.DataFrame({"name": df["name"], "exercise": df["exercise"], "reps": reps, "dur": dur})
+    per = g.groupby(["name", "exercise"], as_index=False).agg(
+        sessions=("reps", "size"), total=("reps", "sum"), duration=("dur", "sum"))
+    vals = g.groupby(["name", "exercise", "reps"], as_index=False).size().rename(columns={"reps": "value", "size": "n"})
+    return per, vals
+
+
+def frame_period(df, period="day"):
+    import pandas as pd
+    df = _rows(df)
+    if df.empty:
+        return pd.DataFrame(columns=["name", period, "exercise", "sessions", "total", "duration"])
+    day = df["timestamp"].astype(str).str[:10]
+    key = day if period == "day" else day.map(week_of) if period == "week" else day.str[:7] + "-01"
+    g = pd.DataFrame({"name": df["name"], period: key, "exercise": df["exercise"],
+                      "reps": pd.to_numeric(df["reps_or_seconds"]).astype(float),
+                      "dur": pd.to_numeric(df["duration_s"]).astype(float)})
+    return g.groupby(["name", period, "exercise"], as_index=False).agg(
+        sessions=("reps", "size"), total=("reps", "sum"), duration=("dur", "sum"))
+
+
+def check(store):
+    # compare the incrementally maintained tables against a full recompute from raw rows
+    import pandas as pd
+    raw = store.query()
+    per, vals = frame_exercise(raw)
+    expected = {"rollup_exercise": per, "rollup_values": vals,
+                **{f"rollup_{p}": frame_period(raw, p) for p in PERIODS}}
+    problems = []
+    for table, want in expected.items():
+        got = store.rollup(table)
+        keys = [c for c in want.columns if c not in ("sessions", "total", "duration", "n")]
+        a = want.sort_values(keys).reset_index(drop=True)
+        b = got[list(want.columns)].sort_values(keys).reset_index(drop=True)
+        try:
+            pd.testing.assert_frame_equal(a, b, check_dtype=False, check_exact=False)
+        except AssertionError as e:
+            problems.append(f"{table}: {e}")
+    return problems
+
+
+def main(argv=None):
+    from store import get_store
+    ap = argparse.ArgumentParser(description="Maintain FitAI rollup tables.")
+    ap.add_argument("cmd", choices=["rebuild", "check"])
+    args = ap.parse_args(argv)
+    store = get_store()
+    if args.cmd == "rebuild":
+        store.rebuild_rollups()
+        print("Rollups rebuilt.")
+        return 0
+    problems = check(store)
+    for p in problems:
+        print(p)
+    print("Rollups match raw history." if not problems else f"{len(problems)} rollup table(s) differ.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
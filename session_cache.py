@@ -0,0 +1,97 @@
+"""Process-wide, version-keyed cache of the full session history.
+
+Streamlit reruns every page script on each widget interaction. The cache
+checks the store's version token (max row id for SQLite, file size for the
+CSV backend) and only touches the data when it changed, reading just the
+rows appended since the last load. The cached arrays are made read-only
+and callers get a shallow copy: adding or replacing columns never leaks back
+into the cache, and writing values in place raises instead of changing the
+history every other browser session sees.
+"""
+import threading
+import time
+
+
+def _freeze(df):
+    # the same columns as read-only views; pandas keeps them as separate, unconsolidated blocks
+    import pandas as pd
+    cols = {}
+    for col in df.columns:
+        arr = df[col].to_numpy(copy=False).view()
+        arr.flags.writeable = False
+        cols[col] = arr
+    return pd.DataFrame(cols, index=df.index, copy=False)
+
+
+class SessionCache:
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._frame = None
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.full_reloads = 0
+        self.tail_reads = 0
+        self.last_reload_ms = 0.0
+        self.total_reload_ms = 0.0
+
+    @property
+    def version(self):
+        return self._version
+
+    def get(self):
+        with self._lock:
+            version = self.store.version()
+            if self._frame is not None and version == self._version:
+                self.hits += 1
+                return self._frame.copy(deep=False)
+            self.misses += 1
+            t0 = time.perf_counter()
+            self._refresh()
+            ms = (time.perf_counter() - t0) * 1000
+            self.last_reload_ms = ms
+            self.total_reload_ms += ms
+            return self._frame.copy(deep=False)
+
+    def _refresh(self):
+        import pandas as pd
+        if self._frame is not None:
+            got = self.store.read_since(self._version)
+            if got is not None:
+                tail, self._version = got
+                if len(tail):
+                    self._frame = _freeze(pd.concat([self._frame, tail], ignore_index=True))
+                self.tail_reads += 1
+                return
+        # first load, or the store was rewritten underneath us
+        frame, self._version = self.store.read_since(0)
+        self._frame = _freeze(frame)
+        self.full_reloads += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._frame = None
+            self._version = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "full_reloads": self.full_reloads, "tail_reads": self.tail_reads,
+                "rows": 0 if self._frame is None else len(self._frame),
+                "version": self._version,
+                "last_reload_ms": round(self.last_reload_ms, 2),
+                "total_reload_ms": round(self.total_reload_ms, 2)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from store import get_store
+            _cache = SessionCache(get_store())
+        return _cache
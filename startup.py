@@ -0,0 +1,57 @@
+"""Cold-start accounting: heavy import cost, page rerun cost and time to first frame.
+
+Heavy modules (cv2, mediapipe) are imported lazily through timed_import(),
+only on the code paths that need them. The first import of each is timed
+here. Every page calls imports_done() after its import block, so the import
+cost of each rerun is recorded. The first of these in a fresh server process
+is also reported as the cold start. The Workout loop adds the time from
+Start to the first frame with record(). report() collects everything for
+the Performance page.
+"""
+import importlib
+import sys
+import threading
+import time
+from collections import deque
+
+_t0 = time.perf_counter()
+_imports = {}
+_events = {}
+_lock = threading.Lock()
+
+
+def timed_import(name):
+    # importlib.import_module(), timing the first import of the module in this process
+    if name in sys.modules:
+        return sys.modules[name]
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        _imports.setdefault(name, time.perf_counter() - t0)
+    return module
+
+
+def record(event, seconds, keep=50):
+    with _lock:
+        _events.setdefault(event, deque(maxlen=keep)).append(seconds)
+
+
+def imports_done(page, t0):
+    # t0: time.perf_counter() taken before the page's imports
+    seconds = time.perf_counter() - t0
+    record(f"imports {page}", seconds)
+    with _lock:
+        _events.setdefault("cold start", deque([seconds], maxlen=1))
+
+
+def report():
+    with _lock:
+        events = {k: sorted(v) for k, v in _events.items()}
+        last = {k: v[-1] for k, v in _events.items()}
+        imports = dict(_imports)
+    return {
+        "uptime_s": round(time.perf_counter() - _t0, 1),
+        "first_import_ms": {k: round(v * 1000, 1) for k, v in imports.items()},
+        "events_ms": {k: {"last": round(last[k] * 1000, 1), "median": round(v[len(v) // 2] * 1000, 1),
+                          "max": round(v[-1] * 1000, 1), "n": len(v)} for k, v in events.items()},
+    }
@@ -0,0 +1,239 @@
+"""Several workout stations tracked from one server, one worker process per camera.
+
+Each station is a process running capture, pose inference and rep counting
+on its own camera, so stations use separate cores instead of sharing the
+Streamlit interpreter's GIL. Workers publish the annotated preview frame
+through a shared-memory triple buffer. The UI copies the newest complete
+slot without any pickling. Counts, status and finished sessions go through
+one event queue. A thread in the server process folds them into the shared
+station table and saves the sessions, so there is still a single writer to
+the session store.
+
+    manager = get_station_manager()
+    sid = manager.add(0, "Squats", name="Alex", target=15)
+    manager.stations(), manager.frame(sid), manager.remove(sid)
+"""
+import atexit
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+SLOTS = 3
+
+
+def _run_station(sid, source, exercise, name, target, profile, shm_name, width, seq, shapes, stop, events,
+                 status_hz=5.0):
+    # worker process body; everything heavy is imported here, in the child
+    import cv2
+    from counting import TIMED, RepCounter, session_record
+    from geometry import frame_features
+    from pipeline import draw_skeleton
+    from pose_backend import make_backend
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slots = np.ndarray((SLOTS, width, width, 3), dtype=np.uint8, buffer=shm.buf)
+    cap = cv2.VideoCapture(source)
+    try:
+        if not cap.isOpened():
+            events.put(("error", sid, f"Camera {source} not available"))
+            return
+        # one OpenCV thread per station; the stations themselves are the parallelism
+        with make_backend(dict(profile, num_threads=1)) as pose:
+            start = time.time()
+            counter = RepCounter(exercise, start)
+            fps, last, last_status = 0.0, time.perf_counter(), 0.0
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    events.put(("error", sid, "Camera frame not received"))
+                    return
+                frame = cv2.flip(frame, 1)
+                lm = pose.estimate(frame)
+                now = time.time()
+                counter.step(None if lm is None else frame_features(lm, counter.signals), now)
+
+                h, w = frame.shape[:2]
+                scale = min(width / w, width / h)
+                small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+                if lm is not None:
+                    draw_skeleton(small, lm)
+                cv2.putText(small, f"{name}: {counter.counter}", (10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.8,
+                            (0, 255, 125), 2)
+                # write the slot after the newest one, then publish it
+                k = (seq.value + 1) % SLOTS
+                sh, sw = small.shape[:2]
+                slots[k, :sh, :sw] = small
+                shapes[2 * k], shapes[2 * k + 1] = sh, sw
+                seq.value += 1
+
+                t = time.perf_counter()
+                fps = 0.9 * fps + 0.1 / max(t - last, 1e-6) if fps else 1.0 / max(t - last, 1e-6)
+                last = t
+                if exercise not in TIMED and counter.counter >= target:
+                    events.put(("session", sid, session_record(exercise, counter.counter, now - start, name=name)))
+                    start = now
+                    counter = RepCounter(exercise, start)
+                if t - last_status >= 1.0 / status_hz:
+                    last_status = t
+                    events.put(("status", sid, {"count": counter.counter, "stage": counter.stage,
+                                                "status": counter.status, "fps": round(fps, 1)}))
+    except Exception as e:
+        events.put(("error", sid, f"{type(e).__name__}: {e}"))
+    finally:
+        cap.release()
+        del slots
+        shm.close()
+        events.put(("stopped", sid, None))
+
+
+class Station:
+    # server-side handle: the worker process, its control event and its shared buffers
+
+    def __init__(self, sid, process, stop, shm, width, seq, shapes, info):
+        self.sid = sid
+        self.process = process
+        self.stop = stop
+        self.shm = shm
+        self.slots = np.ndarray((SLOTS, width, width, 3), dtype=np.uint8, buffer=shm.buf)
+        self.seq = seq
+        self.shapes = shapes
+        self.info = info
+        self.closed = False
+
+
+class StationManager:
+
+    def __init__(self, preview_width=480, save=None):
+        self.preview_width = preview_width
+        self._save = save
+        self._ctx = mp.get_context("spawn")   # fork is unsafe next to Streamlit's and OpenCV's threads
+        self._events = self._ctx.Queue()
+        self._stations = {}
+        self._lock = threading.Lock()
+        self._next = 1
+        self._collector = threading.Thread(target=self._collect, name="fitai-stations", daemon=True)
+        self._collector.start()
+
+    def add(self, source, exercise, name="User", target=12, profile=None):
+        from counting import EXERCISES
+        from pose_backend import load_profile
+        if exercise not in EXERCISES:
+            raise ValueError(f"Unknown exercise: {exercise}")
+        width = self.preview_width
+        shm = shared_memory.SharedMemory(create=True, size=SLOTS * width * width * 3)
+        seq = self._ctx.RawValue("q", -1)
+        shapes = self._ctx.RawArray("i", 2 * SLOTS)
+        stop = self._ctx.Event()
+        with self._lock:
+            sid = self._next
+            self._next += 1
+        process = self._ctx.Process(
+            target=_run_station, name=f"fitai-station-{sid}", daemon=True,
+            args=(sid, source, exercise, name, int(target), profile or load_profile(), shm.name, width,
+                  seq, shapes, stop, self._events))
+        info = {"id": sid, "source": source, "exercise": exercise, "name": name, "target": int(target),
+                "count": 0, "stage": None, "status": "Starting", "fps": 0.0, "sessions": 0, "total": 0,
+                "alive": True, "error": None, "started": time.strftime("%H:%M:%S")}
+        with self._lock:
+            self._stations[sid] = Station(sid, process, stop, shm, width, seq, shapes, info)
+        process.start()
+        return sid
+
+    def _collect(self):
+        while True:
+            try:
+                kind, sid, payload = self._events.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            if kind == "session":
+                # saved even when the station was removed while the event was in flight
+                self._store(payload)
+            with self._lock:
+                station = self._stations.get(sid)
+                if station is None:
+                    continue
+                info = station.info
+                if kind == "status":
+                    info.update(payload)
+                elif kind == "session":
+                    info["sessions"] += 1
+                    info["total"] += payload["reps_or_seconds"]
+                elif kind == "error":
+                    info["error"] = payload
+                elif kind == "stopped":
+                    info["alive"] = False
+                    info["status"] = "Stopped"
+
+    def _store(self, record):
+        if self._save is not None:
+            self._save(record)
+        else:
+            from store import get_store
+            get_store().append(record)
+
+    def stations(self):
+        with self._lock:
+            out = []
+            for s in self._stations.values():
+                if s.info["alive"] and not s.process.is_alive() and s.process.exitcode is not None:
+                    s.info["alive"] = False
+                out.append(dict(s.info))
+        return out
+
+    def frame(self, sid):
+        # copy of the newest preview frame (BGR), or None before the first one.
+        # The copy is taken under the lock, so remove() cannot release the buffer mid-copy.
+        with self._lock:
+            s = self._stations.get(sid)
+            if s is None or s.closed or s.seq.value < 0:
+                return None
+            k = s.seq.value % SLOTS
+            h, w = s.shapes[2 * k], s.shapes[2 * k + 1]
+            return s.slots[k, :h, :w].copy()
+
+    def totals(self):
+        # aggregate over every station: sessions saved, reps/seconds in them, live stations
+        st = self.stations()
+        return {"stations": len(st), "live": sum(s["alive"] for s in st),
+                "sessions": sum(s["sessions"] for s in st), "total": sum(s["total"] for s in st)}
+
+    def remove(self, sid, timeout=3.0):
+        with self._lock:
+            s = self._stations.pop(sid, None)
+        if s is None:
+            return
+        s.stop.set()
+        s.process.join(timeout)
+        if s.process.is_alive():
+            s.process.terminate()
+            s.process.join(1.0)
+        # the worker is gone; release the shared memory once no frame() copy is in progress
+        with self._lock:
+            s.closed = True
+            s.slots = None
+            s.shm.close()
+            s.shm.unlink()
+
+    def stop_all(self):
+        for sid in [s["id"] for s in self.stations()]:
+            self.remove(sid)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_station_manager():
+    # one manager per server, shared by every browser session
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = StationManager()
+            atexit.register(_manager.stop_all)
+        return _manager
@@ -0,0 +1,616 @@
+"""Session history storage behind utils.save_session / utils.load_sessions.
+
+SqliteStore (the default) keeps sessions in data/workout_sessions.db in WAL
+mode, indexed on timestamp, exercise and name. Writes go through one
+background writer thread that group-commits whatever has queued up, so
+concurrent Streamlit sessions never interleave rows and never wait on disk.
+A batch that cannot be committed is retried, then written one row at a time,
+so a bad record is reported and dropped without taking the batch with it.
+On first open an existing data/workout_sessions.csv is migrated once.
+CsvStore is the original append-only file, kept for FITAI_STORE=csv.
+
+    python store.py migrate [--csv PATH]
+"""
+import abc
+import argparse
+import atexit
+import csv
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import rollups
+
+DATA_DIR = "data"
+CSV_PATH = os.path.join(DATA_DIR, "workout_sessions.csv")
+PLANS_PATH = os.path.join(DATA_DIR, "plans.json")
+DB_PATH = os.path.join(DATA_DIR, "workout_sessions.db")
+COLUMNS = ["timestamp", "name", "exercise", "reps_or_seconds", "calories", "duration_s"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    name TEXT,
+    exercise TEXT,
+    reps_or_seconds INTEGER,
+    calories REAL,
+    duration_s INTEGER
+);
+CREATE INDEX IF NOT EXISTS sessions_timestamp ON sessions (timestamp);
+CREATE INDEX IF NOT EXISTS sessions_exercise ON sessions (exercise, timestamp);
+CREATE INDEX IF NOT EXISTS sessions_name ON sessions (name, timestamp);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS plans (
+    name TEXT PRIMARY KEY,
+    computed_at TEXT,
+    last_id INTEGER,
+    payload TEXT
+);
+"""
+
+
+def _bound(value):
+    # date / datetime / str -> timestamp text that compares correctly against stored rows
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def _end_bound(value):
+    # (op, text) for an upper bound; a plain date covers that whole day
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return "<", _bound(value + timedelta(days=1))
+    return "<=", _bound(value)
+
+
+def _is_day(value):
+    return value is None or (isinstance(value, date) and not isinstance(value, datetime))
+
+
+def _key(value):
+    # name / exercise as stored and rolled up: missing values become "" so rollup keys are never NULL
+    return "" if value is None or value != value else str(value)
+
+
+def _clean(records):
+    # (rows with "YYYY-MM-DD HH:MM:SS" timestamps, number of rows dropped for an unreadable timestamp)
+    rows, bad = [], 0
+    for r in records:
+        ts = r.get("timestamp")
+        try:
+            when = ts if isinstance(ts, datetime) else datetime.fromisoformat(str(ts).strip())
+        except ValueError:
+            bad += 1
+            continue
+        rows.append(dict(r, timestamp=when.strftime("%Y-%m-%d %H:%M:%S"),
+                         name=_key(r.get("name")), exercise=_key(r.get("exercise"))))
+    return rows, bad
+
+
+def _period(period):
+    if period not in rollups.PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    return period
+
+
+def _split_page(df, limit):
+    # df: up to limit + 1 rows with an id column, newest first
+    cursor = None
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        cursor = (str(df["timestamp"].iloc[-1]), int(df["id"].iloc[-1]))
+    return df.drop(columns="id").reset_index(drop=True), cursor
+
+
+def _empty():
+    import pandas as pd
+    return pd.DataFrame(columns=COLUMNS)
+
+
+class SessionStore(abc.ABC):
+    # backend interface; query() filters at the storage layer and returns a DataFrame.
+    # A backend must implement the abstract methods; the rest have generic versions built on them.
+
+    @abc.abstractmethod
+    def append(self, record):
+        pass
+
+    @abc.abstractmethod
+    def query(self, exercises=None, start=None, end=None, name=None):
+        pass
+
+    def iter_chunks(self, exercises=None, start=None, end=None, name=None, chunksize=10000):
+        # matching sessions in storage order as DataFrames of at most chunksize rows
+        df = self.query(exercises, start, end, name)
+        for i in range(0, len(df), chunksize):
+            yield df.iloc[i:i + chunksize]
+
+    @abc.abstractmethod
+    def version(self):
+        # cheap token that changes whenever rows are added
+        pass
+
+    @abc.abstractmethod
+    def read_since(self, version):
+        # (rows added after version, new version); None when the caller must reload everything
+        pass
+
+    def rollup(self, table, name=None):
+        # rollup table rows; without materialized tables they are computed from raw history
+        import rollups
+        df = self.query(name=name)
+        if table == "rollup_exercise":
+            return rollups.frame_exercise(df)[0]
+        if table == "rollup_values":
+            return rollups.frame_exercise(df)[1]
+        return rollups.frame_period(df, table[len("rollup_"):])
+
+    def exercise_stats(self, name=None):
+        # per-exercise sessions, total, duration, mean and median
+        import rollups
+        return rollups.exercise_stats(self.rollup("rollup_exercise", name), self.rollup("rollup_values", name))
+
+    def period_totals(self, period="day", name=None, by_exercise=False):
+        # per-day, per-week or per-month sessions, total and duration, oldest first
+        df = self.rollup(f"rollup_{period}", name)
+        keys = [period, "exercise"] if by_exercise else [period]
+        return df.groupby(keys, as_index=False)[["sessions", "total", "duration"]].sum().sort_values(keys)
+
+    def series(self, period="day", exercises=None, start=None, end=None, name=None):
+        # per-bucket sessions, total and duration for every bucket touching [start, end], oldest first
+        df = self.rollup(f"rollup_{_period(period)}", name)
+        if exercises is not None:
+            df = df[df["exercise"].isin(list(exercises))]
+        if start is not None:
+            df = df[df[period] >= rollups.period_of(_bound(start)[:10], period)]
+        if end is not None:
+            df = df[df[period] <= rollups.period_of(_bound(end)[:10], period)]
+        return df.groupby(period, as_index=False)[["sessions", "total", "duration"]].sum().sort_values(period)
+
+    def page(self, exercises=None, start=None, end=None, name=None, before=None, limit=50):
+        # newest-first page of matching sessions older than the keyset cursor `before`.
+        # Returns (rows, cursor of the next page or None); cursors are (timestamp, id).
+        df = self.query(exercises, start, end, name)
+        df.insert(0, "id", range(1, len(df) + 1))    # position in the filtered history
+        if before is not None:
+            ts = df["timestamp"].astype(str)
+            df = df[(ts < before[0]) | ((ts == before[0]) & (df["id"] < before[1]))]
+        df = df.sort_values(["timestamp", "id"], ascending=False).head(limit + 1)
+        return _split_page(df, limit)
+
+    def totals(self, exercises=None, start=None, end=None, name=None):
+        # sessions, total reps/seconds and duration of the matching sessions
+        df = self.query(exercises, start, end, name)
+        return {"sessions": len(df), "total": float(df["reps_or_seconds"].sum()),
+                "duration": float(df["duration_s"].sum())}
+
+    def extent(self, name=None):
+        # (sorted exercises, first timestamp, last timestamp) for building filters; timestamps None when empty
+        df = self.query(name=name)
+        if df.empty:
+            return [], None, None
+        ts = df["timestamp"].astype(str)
+        return sorted(df["exercise"].dropna().unique().tolist()), ts.min(), ts.max()
+
+    def rebuild_rollups(self):
+        pass
+
+    def user_marks(self):
+        # {name: position of that user's latest session}; grows whenever the user logs a session
+        df = self.query()
+        return {} if df.empty else {k: int(v) + 1 for k, v in df.reset_index().groupby("name")["index"].max().items()}
+
+    def user_mark(self, name):
+        return self.user_marks().get(name)
+
+    # precomputed plans: {name: {"computed_at", "last_id", "payload"}}, payload is JSON text.
+    # Without a database they live in a JSON sidecar next to the history file.
+
+    def _read_plans(self):
+        if not os.path.exists(PLANS_PATH):
+            return {}
+        with open(PLANS_PATH) as f:
+            return json.load(f)
+
+    def plan_marks(self):
+        return {k: v["last_id"] for k, v in self._read_plans().items()}
+
+    def get_plan(self, name):
+        return self._read_plans().get(name)
+
+    def put_plans(self, rows):
+        # rows: iterable of (name, computed_at, last_id, payload)
+        plans = self._read_plans()
+        for name, computed_at, last_id, payload in rows:
+            plans[name] = {"computed_at": computed_at, "last_id": last_id, "payload": payload}
+        os.makedirs(os.path.dirname(PLANS_PATH) or ".", exist_ok=True)
+        tmp = PLANS_PATH + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(plans, f)
+        os.replace(tmp, PLANS_PATH)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class CsvStore(SessionStore):
+
+    def __init__(self, path=CSV_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock, open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+            if f.tell() == 0:
+                writer.writeheader()
+            writer.writerow(record)
+
+    @staticmethod
+    def _filter(df, exercises=None, start=None, end=None, name=None):
+        import pandas as pd
+        mask = pd.Series(True, index=df.index)
+        if exercises is not None:
+            mask &= df["exercise"].isin(list(exercises))
+        if name is not None:
+            mask &= df["name"] == name
+        ts = df["timestamp"].astype(str)
+        if start is not None:
+            mask &= ts >= _bound(start)
+        if end is not None:
+            op, bound = _end_bound(end)
+            mask &= (ts < bound) if op == "<" else (ts <= bound)
+        return df[mask].reset_index(drop=True)
+
+    def query(self, exercises=None, start=None, end=None, name=None):
+        import pandas as pd
+        if not os.path.exists(self.path):
+            return _empty()
+        return self._filter(pd.read_csv(self.path), exercises, start, end, name)
+
+    def iter_chunks(self, exercises=None, start=None, end=None, name=None, chunksize=10000):
+        # reads the file chunk by chunk, so memory stays bounded by chunksize
+        import pandas as pd
+        if not os.path.exists(self.path):
+            return
+        for chunk in pd.read_csv(self.path, chunksize=chunksize):
+            chunk = self._filter(chunk, exercises, start, end, name)
+            if len(chunk):
+                yield chunk
+
+    def version(self):
+        # the file is append-only, so its size is the read offset
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def read_since(self, version):
+        import io
+        import pandas as pd
+        version = version or 0
+        size = self.version()
+        if size < version:
+            return None
+        if size == 0:
+            return _empty(), 0
+        with open(self.path, "rb") as f:
+            f.seek(version)
+            tail = f.read(size - version)
+        # only complete lines; a row still being written is picked up next time
+        tail = tail[:tail.rfind(b"\n") + 1]
+        if not tail:
+            return _empty(), version
+        if version == 0:
+            return pd.read_csv(io.BytesIO(tail)), len(tail)
+        return pd.read_csv(io.BytesIO(tail), header=None, names=COLUMNS), version + len(tail)
+
+
+class SqliteStore(SessionStore):
+
+    def __init__(self, path=DB_PATH, batch_size=256, commit_interval=0.05):
+        self.path = path
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA + rollups.SCHEMA)
+        built = conn.execute("SELECT value FROM meta WHERE key = 'rollups'").fetchone()
+        if not built or built[0] != rollups.VERSION:
+            with conn:
+                rollups.rebuild(conn)
+        self._queue = queue.Queue(maxsize=10000)
+        self._writer = threading.Thread(target=self._write_loop, name="fitai-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _conn(self):
+        # one connection per thread; WAL lets readers run alongside the writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write_loop(self):
+        conn = self._conn()
+        while True:
+            batch = [self._queue.get()]
+            # group commit: take whatever else arrives within the commit window
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get(timeout=self.commit_interval))
+            except queue.Empty:
+                pass
+            try:
+                self._write(conn, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, conn, batch):
+        # one transaction for the batch; if it fails, one per row, so a bad row only loses itself
+        try:
+            return self._commit(conn, batch)
+        except Exception:
+            pass
+        stored = 0
+        for record in batch:
+            try:
+                stored += self._commit(conn, [record])
+            except Exception as e:
+                print(f"FitAI store: dropped session {record!r}: {e}", file=sys.stderr)
+        return stored
+
+    def _commit(self, conn, records, retries=3):
+        # a lock held past the connection timeout is retried; other errors are raised at once
+        for attempt in range(retries + 1):
+            try:
+                with conn:
+                    return self._insert(conn, records)
+            except sqlite3.OperationalError:
+                if attempt == retries:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+
+    def _insert(self, conn, records):
+        # returns the number of rows stored
+        records, bad = _clean(records)
+        if bad:
+            print(f"FitAI store: skipped {bad} sessions without a valid timestamp", file=sys.stderr)
+        conn.executemany(
+            f"INSERT INTO sessions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [tuple(r.get(c) for c in COLUMNS) for r in records])
+        rollups.apply(conn, records)
+        return len(records)
+
+    def append(self, record):
+        self._queue.put(dict(record))
+
+    def flush(self):
+        self._queue.join()
+
+    def _where(self, exercises=None, start=None, end=None, name=None):
+        clauses, params = [], []
+        if exercises is not None:
+            exercises = list(exercises)
+            if not exercises:
+                return "WHERE 0", []
+            clauses.append(f"exercise IN ({', '.join('?' * len(exercises))})")
+            params += exercises
+        if name is not None:
+            clauses.append("name = ?")
+            params.append(name)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_bound(start))
+        if end is not None:
+            op, bound = _end_bound(end)
+            clauses.append(f"timestamp {op} ?")
+            params.append(bound)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, exercises=None, start=None, end=None, name=None):
+        import pandas as pd
+        self.flush()
+        where, params = self._where(exercises, start, end, name)
+        return pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM sessions {where} ORDER BY id",
+                                 self._conn(), params=params)
+
+    def iter_chunks(self, exercises=None, start=None, end=None, name=None, chunksize=10000):
+        # keyset on id, one short query per chunk, so no read transaction stays open between chunks.
+        # Without a user filter the rows are walked in id order straight off the table; going through
+        # the exercise or timestamp index would re-sort every remaining match for each chunk.
+        import pandas as pd
+        self.flush()
+        where, params = self._where(exercises, start, end, name)
+        where = (where + " AND " if where else "WHERE ") + "id > ?"
+        source = "sessions" if name is not None else "sessions NOT INDEXED"
+        last = 0
+        while True:
+            df = pd.read_sql_query(f"SELECT id, {', '.join(COLUMNS)} FROM {source} {where} ORDER BY id LIMIT ?",
+                                   self._conn(), params=params + [last, chunksize])
+            if df.empty:
+                return
+            last = int(df["id"].iloc[-1])
+            yield df.drop(columns="id")
+            if len(df) < chunksize:
+                return
+
+    def version(self):
+        self.flush()
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM sessions").fetchone()[0]
+
+    def page(self, exercises=None, start=None, end=None, name=None, before=None, limit=50):
+        # keyset pagination: walks the timestamp index from the cursor, never OFFSET
+        import pandas as pd
+        self.flush()
+        where, params = self._where(exercises, start, end, name)
+        if before is not None:
+            where = (where + " AND " if where else "WHERE ") + "(timestamp, id) < (?, ?)"
+            params += [before[0], int(before[1])]
+        df = pd.read_sql_query(f"SELECT id, {', '.join(COLUMNS)} FROM sessions {where} "
+                               "ORDER BY timestamp DESC, id DESC LIMIT ?", self._conn(), params=params + [limit + 1])
+        return _split_page(df, limit)
+
+    def totals(self, exercises=None, start=None, end=None, name=None):
+        self.flush()
+        if _is_day(start) and _is_day(end):
+            # whole-day ranges are answered from the per-day rollup instead of raw sessions
+            where, params = self._where(exercises, None, None, name)
+            clauses = [where[len("WHERE "):]] if where else []
+            if start is not None:
+                clauses.append("day >= ?")
+                params.append(_bound(start))
+            if end is not None:
+                clauses.append("day <= ?")
+                params.append(_bound(end))
+            sql = "SELECT COALESCE(SUM(sessions), 0), COALESCE(SUM(total), 0), COALESCE(SUM(duration), 0) " \
+                  "FROM rollup_day" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+        else:
+            where, params = self._where(exercises, start, end, name)
+            sql = "SELECT COUNT(*), COALESCE(SUM(reps_or_seconds), 0), COALESCE(SUM(duration_s), 0) " \
+                  f"FROM sessions {where}"
+        n, total, duration = self._conn().execute(sql, params).fetchone()
+        return {"sessions": int(n), "total": float(total), "duration": float(duration)}
+
+    def series(self, period="day", exercises=None, start=None, end=None, name=None):
+        # grouped in SQL over the rollup table, so only one row per bucket leaves the database
+        import pandas as pd
+        self.flush()
+        where, params = self._where(exercises, None, None, name)
+        clauses = [where[len("WHERE "):]] if where else []
+        if start is not None:
+            clauses.append(f"{_period(period)} >= ?")
+            params.append(rollups.period_of(_bound(start)[:10], period))
+        if end is not None:
+            clauses.append(f"{_period(period)} <= ?")
+            params.append(rollups.period_of(_bound(end)[:10], period))
+        return pd.read_sql_query(
+            f"SELECT {_period(period)}, SUM(sessions) AS sessions, SUM(total) AS total, SUM(duration) AS duration "
+            f"FROM rollup_{period}" + (" WHERE " + " AND ".join(clauses) if clauses else "") +
+            " GROUP BY 1 ORDER BY 1", self._conn(), params=params)
+
+    def extent(self, name=None):
+        self.flush()
+        conn = self._conn()
+        where, params = ("WHERE name = ?", [name]) if name is not None else ("", [])
+        exercises = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT exercise FROM rollup_exercise {where} ORDER BY exercise", params) if r[0] is not None]
+        # separate subqueries: SQLite only answers MIN/MAX from the index when each stands alone
+        first, last = conn.execute(f"SELECT (SELECT MIN(timestamp) FROM sessions {where}), "
+                                   f"(SELECT MAX(timestamp) FROM sessions {where})", params * 2).fetchone()
+        return exercises, first, last
+
+    def read_since(self, version):
+        import pandas as pd
+        self.flush()
+        df = pd.read_sql_query(f"SELECT id, {', '.join(COLUMNS)} FROM sessions WHERE id > ? ORDER BY id",
+                               self._conn(), params=[version or 0])
+        new_version = int(df["id"].iloc[-1]) if len(df) else (version or 0)
+        return df.drop(columns="id"), new_version
+
+    def rollup(self, table, name=None):
+        import pandas as pd
+        if table not in rollups.TABLES:
+            raise ValueError(f"Unknown rollup table: {table}")
+        self.flush()
+        where, params = ("WHERE name = ?", [name]) if name is not None else ("", [])
+        return pd.read_sql_query(f"SELECT * FROM {table} {where}", self._conn(), params=params)
+
+    def rebuild_rollups(self):
+        self.flush()
+        conn = self._conn()
+        with conn:
+            rollups.rebuild(conn)
+
+    def user_marks(self):
+        self.flush()
+        return dict(self._conn().execute("SELECT name, MAX(id) FROM sessions GROUP BY name").fetchall())
+
+    def user_mark(self, name):
+        self.flush()
+        return self._conn().execute("SELECT MAX(id) FROM sessions WHERE name = ?", (name,)).fetchone()[0]
+
+    def plan_marks(self):
+        return dict(self._conn().execute("SELECT name, last_id FROM plans").fetchall())
+
+    def get_plan(self, name):
+        row = self._conn().execute("SELECT computed_at, last_id, payload FROM plans WHERE name = ?",
+                                   (name,)).fetchone()
+        return None if row is None else dict(zip(("computed_at", "last_id", "payload"), row))
+
+    def put_plans(self, rows):
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?)", list(rows))
+
+    def migrate_csv(self, csv_path=CSV_PATH, force=False):
+        # one-shot import of the legacy CSV; returns the number of rows copied
+        conn = self._conn()
+        done = conn.execute("SELECT value FROM meta WHERE key = 'migrated_csv'").fetchone()
+        if (done and not force) or not os.path.exists(csv_path):
+            return 0
+        with open(csv_path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.flush()
+        with conn:
+            copied = self._insert(conn, rows)
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated_csv', ?)",
+                         (f"{os.path.abspath(csv_path)} {datetime.now():%Y-%m-%d %H:%M:%S}",))
+        return copied
+
+    def close(self):
+        self.flush()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    # process-wide store shared by every Streamlit session; FITAI_STORE=csv keeps the legacy file
+    global _store
+    with _store_lock:
+        if _store is None:
+            if os.environ.get("FITAI_STORE", "sqlite").lower() == "csv":
+                _store = CsvStore()
+            else:
+                _store = SqliteStore()
+                _store.migrate_csv()
+        return _store
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="FitAI session store maintenance.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    mig = sub.add_parser("migrate", help="copy the legacy CSV history into the SQLite store")
+    mig.add_argument("--csv", default=CSV_PATH)
+    mig.add_argument("--db", default=DB_PATH)
+    mig.add_argument("--force", action="store_true", help="import again even if already migrated")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "migrate":
+        n = SqliteStore(args.db).migrate_csv(args.csv, force=args.force)
+        print(f"Migrated {n} sessions from {args.csv} into {args.db}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import glob
+import os
+from collections import defaultdict
+
+import pytest
+
+import recording
+
+# Keyframe tracking (analyze.py --adaptive) must count exactly like full inference.
+# Clips are named so analyze.guess_exercise() finds the exercise; their landmarks are kept with
+#   python analyze.py tests/fixtures/clips --compare-adaptive --record tests/fixtures/recordings
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+CLIPS = sorted(p for p in glob.glob(os.path.join(FIXTURES, "clips", "*"))
+               if os.path.splitext(p)[1].lower() in (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"))
+RECORDINGS = os.path.join(FIXTURES, "recordings")
+# until clips are committed the cases are reported as skipped, not silently collected as empty
+NO_FIXTURES = pytest.param(None, marks=pytest.mark.skip(reason="no fixture clips committed"))
+
+
+def _runs():
+    # {video: {"full": recording, "adaptive": recording}}
+    runs = defaultdict(dict)
+    for r in recording.list_recordings(RECORDINGS):
+        runs[r["video"]]["adaptive" if r["adaptive"] else "full"] = r
+    return dict(runs)
+
+
+@pytest.mark.parametrize("clip", CLIPS or [NO_FIXTURES], ids=lambda p: p and os.path.basename(p))
+def test_adaptive_counts_like_full_inference(clip):
+    pytest.importorskip("mediapipe")
+    import analyze
+    analyze._init_worker()
+    result = analyze.compare_adaptive(clip, analyze.guess_exercise(clip))
+    assert result["adaptive"] == result["full"], result
+
+
+@pytest.mark.parametrize("video", sorted(_runs()) or [NO_FIXTURES])
+def test_recorded_runs_replay_to_the_same_count(video):
+    # no model needed: the stored landmarks of both runs go back through the counter
+    runs = _runs()[video]
+    assert set(runs) == {"full", "adaptive"}, f"{video}: record both runs"
+    full, adaptive = recording.replay([runs["full"], runs["adaptive"]])
+    assert full == adaptive == runs["full"]["session"]["reps_or_seconds"]
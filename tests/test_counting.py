@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import expected_count, synthetic_landmarks
+from counting import EXERCISES, CounterBank, RepCounter
+from geometry import features, frame_features
+
+
+@pytest.mark.parametrize("exercise", EXERCISES)
+def test_live_counter_matches_bank(exercise):
+    # the scalar live counter and CounterBank follow the same spec frame by frame
+    lm, times = synthetic_landmarks(exercise, reps=8, jitter=3.0, seed=1)
+    lm = lm.copy()
+    lm[np.random.default_rng(1).random(len(lm)) < 0.05] = np.nan
+    feats = features(lm)
+    live, bank = RepCounter(exercise, 0.0), CounterBank([exercise], 0.0)
+    for frame, row, t in zip(lm, feats, times):
+        fired = live.step(frame_features(frame, live.signals), t)
+        assert fired == bool(bank.step(row, t)[0])
+        assert (live.counter, live.stage, live.status, live.metric) == \
+            (int(bank.count[0]), bank.stage(0), bank.status(0), int(bank.metric[0]))
+    assert live.counter == expected_count(exercise, reps=8)
+
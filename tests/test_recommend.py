@@ -0,0 +1,25 @@
+from datetime import date
+
+import pandas as pd
+
+from recommend import recommend_from_history
+
+
+def test_loader_runs_only_when_the_memo_misses():
+    history = pd.DataFrame({"timestamp": ["2024-05-01 08:00:00", "2024-05-02 08:00:00", "2024-05-03 08:00:00"],
+                            "exercise": ["Squats"] * 3, "reps_or_seconds": [10, 12, 14]})
+    loads = []
+
+    def load():
+        loads.append(1)
+        return history
+
+    today = date(2024, 5, 4)
+    first = recommend_from_history(load, version=7, today=today, scope="Alex")
+    assert recommend_from_history(load, version=7, today=today, scope="Alex") is first
+    assert len(loads) == 1
+    # a new session changes the version, another user has another scope
+    recommend_from_history(load, version=8, today=today, scope="Alex")
+    recommend_from_history(load, version=8, today=today, scope="Sam")
+    assert len(loads) == 3
+    assert first["text"] == recommend_from_history(history, today=today)["text"]
@@ -0,0 +1,96 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import rollups
+from store import SqliteStore
+
+
+def _record(when, name="Alex", exercise="Squats", reps=10):
+    return {"timestamp": when.strftime("%Y-%m-%d %H:%M:%S"), "name": name, "exercise": exercise,
+            "reps_or_seconds": reps, "calories": 0, "duration_s": 30}
+
+
+def _store(tmp_path):
+    return SqliteStore(str(tmp_path / "sessions.db"), batch_size=16, commit_interval=0.005)
+
+
+def test_incremental_rollups_match_rebuild(tmp_path):
+    store = _store(tmp_path)
+    # Sun 2024-01-28 .. Tue 2024-02-06: crosses a week and a month boundary
+    start = datetime(2024, 1, 28, 7, 0)
+    for batch in range(5):
+        for i in range(40):
+            when = start + timedelta(hours=6 * i + batch)
+            store.append(_record(when, name=("Alex", "Sam")[i % 2],
+                                 exercise=("Squats", "Plank", "Push-ups")[i % 3], reps=i % 7 + batch))
+        store.flush()
+    assert rollups.check(store) == []
+    weeks = set(store.rollup("rollup_week")["week"])
+    months = set(store.rollup("rollup_month")["month"])
+    assert {"2024-01-22", "2024-01-29", "2024-02-05"} <= weeks
+    assert months == {"2024-01-01", "2024-02-01"}
+    store.close()
+
+
+def test_bad_rows_do_not_stop_the_writer(tmp_path):
+    store = _store(tmp_path)
+    store.append({"timestamp": "", "name": "Alex", "exercise": "Squats", "reps_or_seconds": 5})
+    store.append({"timestamp": "yesterday", "name": "Alex", "exercise": "Squats", "reps_or_seconds": 5})
+    store.append(_record(datetime(2024, 3, 1, 8), name=None))
+    store.flush()
+    store.append(_record(datetime(2024, 3, 1, 9), name=None))
+    store.append(_record(datetime(2024, 3, 2, 9)))
+    store.flush()
+    assert store._writer.is_alive()
+    assert len(store.query()) == 3
+    # missing names share one rollup key instead of adding a row per batch
+    per = store.rollup("rollup_exercise")
+    assert per.loc[per["name"] == "", "sessions"].tolist() == [2]
+    assert rollups.check(store) == []
+    store.close()
+
+
+def test_rebuild_matches_incremental(tmp_path):
+    store = _store(tmp_path)
+    for i in range(60):
+        store.append(_record(datetime(2023, 12, 25) + timedelta(hours=13 * i), reps=i))
+    store.flush()
+    before = {t: store.rollup(t).sort_values(list(store.rollup(t).columns)).reset_index(drop=True)
+              for t in rollups.TABLES}
+    store.rebuild_rollups()
+    for t in rollups.TABLES:
+        after = store.rollup(t)
+        assert after.sort_values(list(after.columns)).reset_index(drop=True).equals(before[t]), t
+    store.close()
+
+
+def test_a_bad_row_only_drops_itself(tmp_path):
+    store = _store(tmp_path)
+    day = datetime(2024, 4, 1, 8)
+    for i in range(3):
+        store.append(_record(day + timedelta(hours=i), name=("Alex", "Sam", "Kim")[i]))
+    store.append(dict(_record(day + timedelta(hours=5)), calories={"x": 1}))
+    store.flush()
+    assert sorted(store.query()["name"]) == ["Alex", "Kim", "Sam"]
+    assert rollups.check(store) == []
+    store.close()
+
+
+def test_a_locked_database_is_retried(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    insert, calls = store._insert, []
+
+    def locked_once(conn, records):
+        calls.append(len(records))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return insert(conn, records)
+
+    monkeypatch.setattr(store, "_insert", locked_once)
+    store.append(_record(datetime(2024, 4, 1, 8)))
+    store.append(_record(datetime(2024, 4, 1, 9)))
+    store.flush()
+    # the whole batch is retried, not split into single rows
+    assert len(store.query()) == 2
+    assert calls[1] == calls[0]
+    store.close()
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from session_cache import SessionCache
+from store import SqliteStore
+
+
+def _record(when, reps=10):
+    return {"timestamp": when.strftime("%Y-%m-%d %H:%M:%S"), "name": "Alex", "exercise": "Squats",
+            "reps_or_seconds": reps, "calories": 1.5, "duration_s": 30}
+
+
+def test_cached_history_is_read_only(tmp_path):
+    store = SqliteStore(str(tmp_path / "sessions.db"), batch_size=16, commit_interval=0.005)
+    cache = SessionCache(store)
+    for i in range(3):
+        store.append(_record(datetime(2024, 1, 1) + timedelta(days=i), reps=i))
+    store.flush()
+    for _ in range(2):
+        # the first get loads everything, the second reads the appended tail
+        df = cache.get()
+        for col, value in (("reps_or_seconds", 999), ("calories", 9.0), ("name", "Sam")):
+            with pytest.raises(ValueError):
+                df.loc[0, col] = value
+        df["extra"] = 1
+        store.append(_record(datetime(2024, 2, 1)))
+        store.flush()
+    df = cache.get()
+    assert cache.tail_reads == 2
+    assert "extra" not in df
+    assert df["reps_or_seconds"].tolist() == [0, 1, 2, 10, 10]
+    assert (df["name"] == "Alex").all()
+    store.close()
@@ -0,0 +1,119 @@
+"""Chart-ready activity series built from the day/week/month rollups.
+
+The rollup tables are kept current by every save, so a series never scans
+raw sessions. The store returns one row per bucket (SessionStore.series).
+Here the buckets with no sessions are filled in as zeros. The resolution is
+picked from the requested range, and at most max_points points reach the
+chart. Largest-Triangle-Three-Buckets (LTTB) chooses which points to keep,
+so peaks and dips survive the downsampling. Rolling averages and the linear
+trend are computed over the full series and sampled at the same points.
+
+    df, resolution, slope = chart_frame("total", name="Alex", start=date(2024, 1, 1), window=4, show_trend=True)
+    st.line_chart(df)
+"""
+from datetime import date
+
+import numpy as np
+
+from rollups import PERIODS, period_of
+
+MAX_POINTS = 400
+METRICS = {"total": "Reps / seconds", "sessions": "Sessions", "duration": "Minutes trained"}
+# pandas frequency of each rollup bucket, and a default rolling window in buckets
+FREQ = {"day": "D", "week": "W-MON", "month": "MS"}
+WINDOW = {"day": 7, "week": 4, "month": 3}
+_DAYS = {"day": 1, "week": 7, "month": 30.44}
+
+
+def pick_resolution(start, end, max_points=MAX_POINTS):
+    # finest bucket that keeps [start, end] within max_points buckets
+    span = (end - start).days + 1
+    for period in PERIODS:
+        if span / _DAYS[period] <= max_points:
+            return period
+    return PERIODS[-1]
+
+
+def lttb(y, n):
+    # indices of n points of y (evenly spaced x) chosen by Largest-Triangle-Three-Buckets
+    y = np.asarray(y, dtype=np.float64)
+    m = len(y)
+    if n >= m:
+        return np.arange(m)
+    if n < 3:
+        raise ValueError("LTTB needs at least 3 points")
+    # the first and last points are kept; the m - 2 in between are split into n - 2 buckets
+    edges = np.append(np.linspace(1, m - 1, n - 1).astype(int), m)
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, m - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # the third vertex is the mean of the next bucket (the last point for the last bucket)
+        cx = (edges[i + 1] + edges[i + 2] - 1) / 2.0
+        cy = y[edges[i + 1]:edges[i + 2]].mean()
+        x = np.arange(lo, hi)
+        area = np.abs((a - cx) * (y[lo:hi] - y[a]) - (a - x) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def rolling(s, window):
+    # mean over the last `window` buckets; the first buckets average what is available
+    return s.rolling(window, min_periods=1).mean()
+
+
+def trend(s):
+    # least-squares line through the series: (fitted values, change per bucket)
+    import pandas as pd
+    if len(s) < 2:
+        return s.astype(float), 0.0
+    x = np.arange(len(s))
+    slope, intercept = np.polyfit(x, s.to_numpy(dtype=np.float64), 1)
+    return pd.Series(intercept + slope * x, index=s.index), float(slope)
+
+
+def series(metric="total", name=None, exercises=None, start=None, end=None, resolution="auto",
+           max_points=MAX_POINTS, store=None):
+    # (pd.Series of metric per bucket with empty buckets as 0, resolution); start/end are dates
+    import pandas as pd
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    if store is None:
+        from store import get_store
+        store = get_store()
+    if start is None or end is None:
+        _, first, last = store.extent(name)
+        if first is None:
+            return pd.Series(dtype=float, name=metric), resolution if resolution != "auto" else "day"
+        start = start or date.fromisoformat(first[:10])
+        end = end or max(date.fromisoformat(last[:10]), start)
+    if resolution == "auto":
+        resolution = pick_resolution(start, end, max_points)
+    df = store.series(resolution, exercises, start, end, name)
+    index = pd.date_range(period_of(start.isoformat(), resolution), end, freq=FREQ[resolution])
+    s = pd.Series(df[metric].to_numpy(dtype=np.float64), index=pd.to_datetime(df[resolution]))
+    if metric == "duration":
+        s = s / 60.0
+    return s.reindex(index, fill_value=0.0).rename(metric), resolution
+
+
+def chart_frame(metric="total", name=None, exercises=None, start=None, end=None, resolution="auto",
+                max_points=MAX_POINTS, window=None, show_trend=False, store=None):
+    # (DataFrame for st.line_chart with at most max_points rows, resolution, trend slope or None).
+    # window: rolling average length in buckets, "auto" for the resolution's default, None for none
+    import pandas as pd
+    s, resolution = series(metric, name, exercises, start, end, resolution, max_points, store)
+    label = METRICS[metric]
+    cols, slope = {label: s}, None
+    if window == "auto":
+        window = WINDOW[resolution]
+    if window:
+        cols[f"{window}-{resolution} average"] = rolling(s, window)
+    if show_trend:
+        cols["Trend"], slope = trend(s)
+    df = pd.DataFrame(cols)
+    if len(df) > max_points:
+        df = df.iloc[lttb(s.to_numpy(), max_points)]
+    return df, resolution, slope
@@ -0,0 +1,161 @@
+"""Keyframe pose inference with ROI cropping and optical-flow tracking in between.
+
+AdaptivePose wraps a pose backend (pose_backend.py). Full inference runs only on keyframes,
+on a downscaled crop around the person taken from the last landmarks. On
+the frames in between, landmarks are carried forward with pyramidal
+Lucas-Kanade optical flow. The keyframe interval shrinks when the body
+moves fast and grows when inference is slow compared to the frame budget.
+Fast reps therefore still get a keyframe on every frame, and slow holds
+(planks, the top of a squat) are cheap.
+
+It is only used offline (analyze.py --adaptive) until the regression in
+tests/test_adaptive_replay.py passes on committed clips of every exercise.
+"""
+import math
+import time
+
+import cv2
+import numpy as np
+
+_LK = dict(winSize=(21, 21), maxLevel=3,
+           criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+
+class AdaptivePose:
+
+    def __init__(self, pose, max_interval=3, motion_fast=0.02, motion_slow=0.006,
+                 frame_budget=1 / 30, margin=0.3, max_side=384, min_visible=0.5):
+        self.pose = pose
+        self.max_interval = max_interval
+        self.motion_fast = motion_fast      # normalized px/frame at which every frame is a keyframe
+        self.motion_slow = motion_slow      # ... and below which max_interval is used
+        self.frame_budget = frame_budget
+        self.margin = margin
+        self.max_side = max_side
+        self.min_visible = min_visible
+        self.interval = 1
+        self.keyframes = 0
+        self.tracked = 0
+        self.infer_s = 0.0
+        self.convert_s = 0.0
+        self._lm = None
+        self._gray = None
+        self._since_key = 0
+        self._roi = None
+
+    def _roi_for(self, lm, w, h):
+        # crop box in pixels around visible landmarks; kept while the body stays inside its inner part
+        vis = lm[:, 3] >= self.min_visible
+        if vis.sum() < 8:
+            return None
+        x0, y0 = lm[vis, 0].min(), lm[vis, 1].min()
+        x1, y1 = lm[vis, 0].max(), lm[vis, 1].max()
+        if self._roi is not None:
+            rx0, ry0, rx1, ry1 = self._roi
+            mx, my = (rx1 - rx0) * 0.1 / w, (ry1 - ry0) * 0.1 / h
+            if rx0 / w + mx <= x0 and x1 <= rx1 / w - mx and ry0 / h + my <= y0 and y1 <= ry1 / h - my:
+                return self._roi
+        bw, bh = (x1 - x0) * (1 + 2 * self.margin), (y1 - y0) * (1 + 2 * self.margin)
+        side = max(bw * w, bh * h)
+        cx, cy = (x0 + x1) / 2 * w, (y0 + y1) / 2 * h
+        box = (int(max(0, cx - side / 2)), int(max(0, cy - side / 2)),
+               int(min(w, cx + side / 2)), int(min(h, cy + side / 2)))
+        if box[2] - box[0] < 32 or box[3] - box[1] < 32:
+            return None
+        return box
+
+    def _infer(self, frame, roi):
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = roi or (0, 0, w, h)
+        crop = frame[y0:y1, x0:x1]
+        ch, cw = crop.shape[:2]
+        t0 = time.perf_counter()
+        scale = min(1.0, self.max_side / max(ch, cw))
+        if scale < 1.0:
+            crop = cv2.resize(crop, (int(cw * scale), int(ch * scale)), interpolation=cv2.INTER_AREA)
+        self.convert_s += time.perf_counter() - t0
+        lm = self.pose.estimate(crop)
+        self.convert_s += getattr(self.pose, "convert_s", 0.0)
+        if lm is None:
+            return None
+        # crop-normalized -> frame-normalized
+        lm[:, 0] = (x0 + lm[:, 0] * cw) / w
+        lm[:, 1] = (y0 + lm[:, 1] * ch) / h
+        lm[:, 2] *= cw / w
+        return lm
+
+    def _keyframe(self, frame):
+        h, w = frame.shape[:2]
+        t0 = time.perf_counter()
+        lm = self._infer(frame, self._roi) if self._roi else None
+        if lm is None:
+            # lost the person inside the crop: fall back to the whole frame
+            lm = self._infer(frame, None)
+        self.infer_s = time.perf_counter() - t0
+        self._roi = self._roi_for(lm, w, h) if lm is not None else None
+        self.keyframes += 1
+        return lm
+
+    def _track(self, gray, w, h):
+        prev = self._lm
+        pts = (prev[:, :2] * (w, h)).astype(np.float32).reshape(-1, 1, 2)
+        nxt, status, _ = cv2.calcOpticalFlowPyrLK(self._gray, gray, pts, None, **_LK)
+        ok = status.ravel() == 1
+        vis = prev[:, 3] >= self.min_visible
+        if (ok & vis).sum() < max(4, 0.7 * vis.sum()):
+            return None, 0.0
+        lm = prev.copy()
+        moved = nxt.reshape(-1, 2)[ok] / (w, h)
+        lm[ok, :2] = moved
+        motion = float(np.median(np.hypot(*(moved - prev[ok, :2]).T)))
+        self.tracked += 1
+        return lm, motion
+
+    def _adapt(self, motion):
+        if motion >= self.motion_fast:
+            interval = 1
+        elif motion <= self.motion_slow:
+            interval = self.max_interval
+        else:
+            f = (self.motion_fast - motion) / (self.motion_fast - self.motion_slow)
+            interval = 1 + int(f * (self.max_interval - 1))
+        # if one inference eats more than a frame, spread keyframes so the loop keeps up
+        if self.infer_s > self.frame_budget:
+            interval = max(interval, min(self.max_interval, math.ceil(self.infer_s / self.frame_budget)))
+        self.interval = interval
+
+    def estimate(self, frame):
+        # frame: BGR image -> (33, 4) landmarks in frame-normalized coordinates, or None
+        h, w = frame.shape[:2]
+        t0 = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.convert_s = time.perf_counter() - t0
+        lm = None
+        if self._lm is not None and self._since_key < self.interval:
+            lm, motion = self._track(gray, w, h)
+            if lm is not None:
+                self._since_key += 1
+                self._adapt(motion)
+        if lm is None:
+            span = max(1, self._since_key)
+            lm = self._keyframe(frame)
+            self._since_key = 1
+            if lm is not None and self._lm is not None:
+                self._adapt(float(np.median(np.hypot(*(lm[:, :2] - self._lm[:, :2]).T))) / span)
+        self._lm, self._gray = lm, gray
+        return lm
+
+    def close(self):
+        self.pose.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self):
+        total = self.keyframes + self.tracked
+        return {"keyframes": self.keyframes, "tracked": self.tracked, "interval": self.interval,
+                "keyframe_ratio": round(self.keyframes / total, 3) if total else 0.0,
+                "infer_ms": round(self.infer_s * 1000, 1)}
@@ -1,4 +1,4 @@
-import math, csv, os
+import math
 import streamlit as st
 
 def logo_html():
@@ -13,26 +13,74 @@ def dist(a, b):
     return math.sqrt((a[0]-b[0])**2 + (a[1]-b[1])**2)
 
 def beep(enable):
+    # queued on the audio worker; never blocks the caller
     if enable:
-        import os
-        os.system('echo "\a"')
+        from audio import get_audio
+        get_audio().beep()
 
 def speak(count, enable):
     if enable:
-        import pyttsx3
-        pyttsx3.init().say(str(count))
+        from audio import get_audio
+        get_audio().count(count)
 
 def save_session(record):
-    os.makedirs("data", exist_ok=True)
-    with open("data/workout_sessions.csv", "a", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=record.keys())
-        if f.tell() == 0:
-            writer.writeheader()
-        writer.writerow(record)
-
-def load_sessions():
-    import pandas as pd
-    if os.path.exists("data/workout_sessions.csv"):
-        return pd.read_csv("data/workout_sessions.csv")
-    else:
-        return pd.DataFrame(columns=["timestamp","name","exercise","reps_or_seconds","calories","duration_s"])
+    from store import get_store
+    get_store().append(record)
+
+def load_sessions(exercises=None, start=None, end=None, name=None):
+    # unfiltered loads come from the shared cache, filtered ones go straight to the store
+    if exercises is None and start is None and end is None and name is None:
+        from session_cache import get_cache
+        return get_cache().get()
+    from store import get_store
+    return get_store().query(exercises, start, end, name)
+
+def sessions_version():
+    # the store's version token (max row id, or file size for CSV), for memoizing derived work;
+    # cheap, and read without loading any sessions
+    from store import get_store
+    return get_store().version()
+
+def cache_stats():
+    from session_cache import get_cache
+    return get_cache().stats()
+
+def exercise_stats(name=None):
+    from store import get_store
+    return get_store().exercise_stats(name)
+
+def period_totals(period="day", name=None, by_exercise=False):
+    from store import get_store
+    return get_store().period_totals(period, name, by_exercise)
+
+def session_page(exercises=None, start=None, end=None, name=None, before=None, limit=50):
+    # one newest-first page of filtered sessions and the cursor of the next one
+    from store import get_store
+    return get_store().page(exercises, start, end, name, before=before, limit=limit)
+
+def session_totals(exercises=None, start=None, end=None, name=None):
+    from store import get_store
+    return get_store().totals(exercises, start, end, name)
+
+def session_extent(name=None):
+    # (exercises, first timestamp, last timestamp) of one user's history, or everyone's
+    from store import get_store
+    return get_store().extent(name)
+
+def current_user():
+    # the plain key Settings copies the name into; the widget's own key does not outlive its page
+    return st.session_state.get("user_name") or "User"
+
+def load_plan(name):
+    # precomputed plan for one user plus whether it is fresh: made today (the mini plan
+    # is dated from the day it was computed) and covering their latest session
+    from datetime import date
+    from store import get_store
+    from plans import from_payload
+    store = get_store()
+    row = store.get_plan(name)
+    if row is None:
+        return None, False
+    mark = store.user_mark(name)
+    fresh = str(row["computed_at"])[:10] == date.today().isoformat() and (mark is None or row["last_id"] >= mark)
+    return dict(from_payload(row["payload"]), computed_at=row["computed_at"]), fresh